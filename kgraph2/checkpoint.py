@@ -0,0 +1,47 @@
+import json
+import logging
+import os
+import threading
+from typing import Optional
+from .models import Checkpoint
+
+
+class CheckpointStore:
+    def __init__(self, path: str, dump_path: str):
+        """
+        Persists the ingestion Checkpoint for a dump as a small JSON file.
+
+        Args:
+            path (str): Location of the checkpoint file.
+            dump_path (str): The dump being ingested. A checkpoint written for a
+                different dump is ignored on load.
+        """
+        self.path = path
+        self.dump_path = dump_path
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[Checkpoint]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("dump_path") != self.dump_path:
+            logging.warning(f"Ignoring checkpoint {self.path}: written for {data.get('dump_path')}, not {self.dump_path}")
+            return None
+        return Checkpoint(page_id=data["page_id"], stream_offset=data.get("stream_offset"))
+
+    def save(self, checkpoint: Checkpoint):
+        """Atomically replace the checkpoint file, so a crash mid-write never leaves a torn checkpoint."""
+        data = {
+            "dump_path": self.dump_path,
+            "page_id": checkpoint.page_id,
+            "stream_offset": checkpoint.stream_offset,
+        }
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        logging.debug(f"Saved checkpoint at page {checkpoint.page_id} (stream offset {checkpoint.stream_offset})")
@@ -0,0 +1,68 @@
+import re
+from collections import Counter
+from typing import Optional
+from .models import Chunk, NodeType
+from .config import ChunkFilterConfig, DEFAULT_CHUNK_FILTER
+from .page_parser import hidden_spans, strip_markup, with_spans_removed
+
+_CATEGORY_RE = re.compile(r"\[\[\s*category\s*:", re.IGNORECASE)
+_TEMPLATE_EDGE_RE = re.compile(r"\{\{|\}\}")
+# Table syntax and rows: "{|", "|-", "| cell", "! header", "|}"
+_TABLE_LINE_RE = re.compile(r"^[ \t]*(?:\{\||[|!]).*$", re.MULTILINE)
+
+
+class ChunkFilter:
+    def __init__(self, config: ChunkFilterConfig = DEFAULT_CHUNK_FILTER):
+        """
+        Decides which paragraph chunks are worth embedding. Short description and
+        date-format templates, category lists and infobox residue come out of the
+        parser as chunks of their own; they are still written as nodes, but their
+        embeddings would be near-identical noise.
+
+        Headings are always embedded. `skipped` counts the rejected chunks by reason.
+
+        Args:
+            config (ChunkFilterConfig): Thresholds and detectors to apply.
+        """
+        self.config = config
+        self.skipped = Counter()
+
+    def reject_reason(self, chunk: Chunk) -> Optional[str]:
+        """Returns why the chunk should not be embedded ("category_only", "template_only", "too_short"), or None."""
+        if chunk.type != NodeType.PARAGRAPH:
+            return None
+        text = chunk.plain_text if chunk.plain_text is not None else strip_markup(chunk.content)
+
+        if not text:
+            if self.config.skip_category_only and _CATEGORY_RE.search(chunk.content):
+                return "category_only"
+            if self.config.skip_template_only and "{{" in chunk.content:
+                return "template_only"
+        if len(text) < self.config.min_prose_chars:
+            return "too_short"
+        if self.config.skip_template_only and "|" in chunk.content:
+            if len(self._prose_outside_templates(chunk.content)) < max(self.config.min_prose_chars, 1):
+                return "template_only"
+        return None
+
+    def accept(self, chunk: Chunk) -> bool:
+        """True if the chunk should be embedded; counts it under its reason otherwise."""
+        reason = self.reject_reason(chunk)
+        if reason is not None:
+            self.skipped[reason] += 1
+            return False
+        return True
+
+    @staticmethod
+    def _prose_outside_templates(content: str) -> str:
+        # The splitter cuts infoboxes and stats tables in half. Templates cut at
+        # either edge of the chunk are closed again, so that their parameters are
+        # stripped with them, and table rows are dropped. Prose around complete
+        # templates ("{{Nihongo|...}} is the capital of Japan") is kept.
+        depth = lowest = 0
+        for match in _TEMPLATE_EDGE_RE.finditer(content):
+            depth += 1 if match.group() == "{{" else -1
+            lowest = min(lowest, depth)
+        balanced = "{{" * -lowest + content + "}}" * (depth - lowest)
+        prose = with_spans_removed(balanced, 0, len(balanced), hidden_spans(balanced))
+        return strip_markup(_TABLE_LINE_RE.sub("", prose))
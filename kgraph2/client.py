@@ -1,30 +1,92 @@
 from neo4j import GraphDatabase
+from neo4j.exceptions import DriverError, Neo4jError
+import base64
 import logging
+import os
 import time
 import json
 import threading
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Union, Dict, Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import List, Union, Dict, Any, Callable, Iterable
+import numpy as np
 from .models import Node, Link, NodeType
 from .config import DEFAULT_CONFIG
 from .tracing import get_tracer
 
 tracer = get_tracer(__name__)
 
+METRICS_LEVELS = ("off", "basic", "full")
+
 class KGraphClient:
     def __init__(self, uri: str = DEFAULT_CONFIG.neo4j_uri, 
                  user: str = DEFAULT_CONFIG.neo4j_user, 
                  password: str = DEFAULT_CONFIG.neo4j_password, 
                  batch_size: int = DEFAULT_CONFIG.batch_size,
-                 max_concurrency: int = DEFAULT_CONFIG.max_concurrency):
+                 max_concurrency: int = DEFAULT_CONFIG.max_concurrency,
+                 max_inflight_batches: int = DEFAULT_CONFIG.max_inflight_batches,
+                 max_inflight_bytes: int = DEFAULT_CONFIG.max_inflight_bytes,
+                 metrics_level: str = DEFAULT_CONFIG.metrics_level,
+                 write_retries: int = DEFAULT_CONFIG.write_retries,
+                 write_retry_backoff: float = DEFAULT_CONFIG.write_retry_backoff,
+                 dead_letter_path: str = DEFAULT_CONFIG.dead_letter_path):
+        """
+        Buffers nodes and links and writes them to Neo4j in background batches.
+
+        Submitted sub-batches that have not finished yet are bounded by count
+        and by estimated size. Once either limit is reached, write_nodes,
+        write_links and flushes block until Neo4j has absorbed enough of the
+        backlog, so producers slow down to the speed Neo4j can actually write.
+
+        metrics_level controls the per-batch byte metrics: "basic" reports the
+        estimate made for the in-flight limits, "full" serializes every batch to
+        JSON for an exact size (slow; for debugging), "off" reports no sizes.
+
+        A sub-batch that fails with a retryable error (deadlocks between
+        concurrent MERGEs, lost connections) is retried up to write_retries
+        times, waiting write_retry_backoff seconds and doubling each time. A
+        sub-batch that still fails is appended to the dead-letter JSONL file at
+        dead_letter_path (empty disables it), can be re-sent later with
+        replay_dead_letters(), and makes close() raise.
+
+        Link sub-batches only start once every node sub-batch submitted before
+        them has committed, since a link whose endpoints are missing matches
+        nothing. Targets of stub_target links (mentions of pages that may live in
+        another dump shard) are first created as Title nodes with stub=true,
+        unless they exist; writing the real page later clears the flag. Links
+        that still find no endpoint are counted in dropped_links.
+        """
+        if metrics_level not in METRICS_LEVELS:
+            raise ValueError(f"Unknown metrics level '{metrics_level}', expected one of {METRICS_LEVELS}")
         self._driver = GraphDatabase.driver(uri, auth=(user, password))
         self.batch_size = batch_size
+        self.max_inflight_batches = max_inflight_batches
+        self.max_inflight_bytes = max_inflight_bytes
+        self.metrics_level = metrics_level
+        self.write_retries = write_retries
+        self.write_retry_backoff = write_retry_backoff
+        self.dead_letter_path = dead_letter_path
+        self._dead_letter_lock = threading.Lock()
+        self.failed_batches = 0
         self._node_buffer: List[Node] = []
         self._link_buffer: List[Link] = []
         self._buffer_lock = threading.Lock()
         self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
         self._semaphore = threading.Semaphore(max_concurrency)
-        self._futures = []
+        self._futures: List[Future] = []
+        # Node sub-batches that link sub-batches have to wait for
+        self._node_futures: List[Future] = []
+        self.dropped_links = 0
+        self._dropped_links_lock = threading.Lock()
+        # Pending (futures, callback) commit barriers, oldest first
+        self._barriers = deque()
+        self._barrier_lock = threading.Lock()
+        # Submitted but unfinished sub-batches and their estimated size
+        self._inflight = threading.Condition()
+        self._inflight_batches = 0
+        self._inflight_bytes = 0
+        # Total time producers spent blocked on the in-flight limits
+        self.backpressure_seconds = 0.0
 
     @tracer.start_as_current_span("KGraphClient.close")
     def close(self):
@@ -32,7 +94,14 @@ class KGraphClient:
         # Wait for all background tasks to complete
         logging.info("Waiting for background Neo4j tasks to complete...")
         self._executor.shutdown(wait=True)
+        if self.backpressure_seconds:
+            logging.info(f"Producers waited {self.backpressure_seconds:.1f}s on the Neo4j write backlog.")
+        if self.dropped_links:
+            logging.warning(f"Dropped {self.dropped_links} link(s) whose source or target node does not exist.")
         self._driver.close()
+        if self.failed_batches:
+            where = f"; they were written to {self.dead_letter_path} for replay" if self.dead_letter_path else ""
+            raise RuntimeError(f"{self.failed_batches} Neo4j sub-batch(es) failed after retries{where}")
 
     @tracer.start_as_current_span("KGraphClient.ensure_constraints")
     def ensure_constraints(self):
@@ -54,14 +123,63 @@ class KGraphClient:
             self._flush_nodes_unlocked()
             self._flush_links_unlocked()
 
+    def commit_barrier(self, callback: Callable[[], None]):
+        """
+        Flush all buffered nodes and links, then call `callback` once every batch
+        submitted so far has been committed to Neo4j.
+
+        Callbacks run in registration order on a background thread. A callback is
+        never called if one of the batches it covers failed, so it is safe to use
+        for persisting resume checkpoints.
+        """
+        with self._buffer_lock:
+            self._flush_nodes_unlocked()
+            self._flush_links_unlocked()
+            # Successfully committed batches no longer need tracking
+            self._futures = [f for f in self._futures if not f.done() or f.exception() is not None]
+            pending = list(self._futures)
+
+        with self._barrier_lock:
+            self._barriers.append((pending, callback))
+        self._fire_barriers()
+
+    def _fire_barriers(self, _future: Future = None):
+        with self._barrier_lock:
+            while self._barriers:
+                pending, callback = self._barriers[0]
+                if not all(f.done() for f in pending):
+                    return
+                if any(f.exception() is not None for f in pending):
+                    # Every later barrier covers the failed batch as well
+                    logging.error(f"Dropping {len(self._barriers)} commit barrier(s) after a failed batch.")
+                    self._barriers.clear()
+                    return
+                self._barriers.popleft()
+                callback()
+
     def write_nodes(self, nodes: List[Node]):
         if not nodes: return
+        self.write_many(nodes=nodes)
+
+    def write_many(self, nodes: Iterable[Node] = (), links: Iterable[Link] = ()):
+        """
+        Buffers nodes and links in one step, taking the buffer lock once. Producers
+        should hand over a whole page (or batch of pages) at a time rather than
+        calling write_nodes/write_links per item.
+        """
         with self._buffer_lock:
-            logging.debug(f"Buffering {len(nodes)} nodes. Current buffer size: {len(self._node_buffer)}")
+            node_count, link_count = len(self._node_buffer), len(self._link_buffer)
             self._node_buffer.extend(nodes)
+            self._link_buffer.extend(links)
+            logging.debug("Buffered %s nodes and %s links. Current buffer sizes: %s nodes, %s links",
+                          len(self._node_buffer) - node_count, len(self._link_buffer) - link_count,
+                          len(self._node_buffer), len(self._link_buffer))
             if len(self._node_buffer) >= self.batch_size:
-                logging.debug(f"Node buffer reached batch size ({self.batch_size}). Flushing...")
+                logging.debug("Node buffer reached batch size (%s). Flushing...", self.batch_size)
                 self._flush_nodes_unlocked()
+            if len(self._link_buffer) >= self.batch_size:
+                logging.debug("Link buffer reached batch size (%s). Flushing...", self.batch_size)
+                self._flush_links_unlocked()
 
     @tracer.start_as_current_span("KGraphClient.flush_nodes")
     def flush_nodes(self):
@@ -71,7 +189,7 @@ class KGraphClient:
     def _flush_nodes_unlocked(self):
         """Internal method to flush nodes. Assumes _buffer_lock is held."""
         if not self._node_buffer: return        
-        logging.debug(f"Flushing {len(self._node_buffer)} nodes from buffer.")
+        logging.debug("Flushing %s nodes from buffer.", len(self._node_buffer))
         nodes_to_flush = self._node_buffer
         self._node_buffer = []
 
@@ -83,30 +201,30 @@ class KGraphClient:
         for node_type, batch in by_type.items():
             if not batch: continue
             label = node_type.value
-            logging.debug(f"Submitting {len(batch)} nodes of type {label} to executor.")
+            logging.debug("Submitting %s nodes of type %s to executor.", len(batch), label)
             # Optimization: Using a single MERGE with SET is standard, but we ensure
             # that we're matching on the indexed UID. 
             # Given "mostly new" nodes, we still use MERGE for safety.
             # Optimization: Smart MERGE - avoid n += row on match if unnecessary
             # Using row properties directly in ON MATCH to be explicit.
-            props_to_set = ", ".join([f"n.{k} = row.{k}" for k in batch[0].keys() if k != "uid"])
+            # Union of keys, since rows differ (chunks skipped by the chunk filter have no
+            # embedding); a key missing from a row is null and removes the property on match
+            keys = dict.fromkeys(k for row in batch for k in row)
+            # Writing the real node turns a stub created for a mention into a full node,
+            # with the node's own label
+            props_to_set = ", ".join([f"n.{k} = row.{k}" for k in keys if k != "uid"] + ["n.stub = null"])
             
             cypher = f"""
             UNWIND $batch AS row
             MERGE (n:Resource {{uid: row.uid}})
             ON CREATE SET n:{label}, n += row
-            ON MATCH SET {props_to_set}
+            ON MATCH SET n:{label}, {props_to_set}
             """
-            self._run_batch(cypher, batch, label=f"Nodes:{label}")
+            self._node_futures.extend(self._run_batch(cypher, batch, label=f"Nodes:{label}"))
 
     def write_links(self, links: List[Link]):
         if not links: return
-        with self._buffer_lock:
-            logging.debug(f"Buffering {len(links)} links. Current buffer size: {len(self._link_buffer)}")
-            self._link_buffer.extend(links)
-            if len(self._link_buffer) >= self.batch_size:
-                logging.debug(f"Link buffer reached batch size ({self.batch_size}). Flushing...")
-                self._flush_links_unlocked()
+        self.write_many(links=links)
 
     @tracer.start_as_current_span("KGraphClient.flush_links")
     def flush_links(self):
@@ -116,70 +234,290 @@ class KGraphClient:
     def _flush_links_unlocked(self):
         """Internal method to flush links. Assumes _buffer_lock is held."""
         if not self._link_buffer: return
-        logging.debug(f"Flushing {len(self._link_buffer)} links from buffer.")
+        logging.debug("Flushing %s links from buffer.", len(self._link_buffer))
         links_to_flush = self._link_buffer
         self._link_buffer = []
         
         # Optimization: Use MATCH where possible, and only MERGE for stubs.
         # This significantly reduces the overhead of re-creating/checking existing nodes.
         batch_data = [{"source": l.source_uid, "target": l.target_uid} for l in links_to_flush]
-        logging.debug(f"Submitting {len(batch_data)} links to executor.")
+        logging.debug("Submitting %s links to executor.", len(batch_data))
 
         # Optimization: Match-Match-Merge pattern. 
         # Don't MERGE target nodes during link creation. 
-        # This assumes nodes are already created or will be created in their own flush.
+        # Endpoints buffered so far are flushed first, and the link sub-batches wait
+        # for every node sub-batch that has not committed yet.
+        # The count of matched rows tells how many links were dropped.
+        self._flush_nodes_unlocked()
+        # Failed node batches stay, so links depending on them are dead-lettered too
+        self._node_futures = [f for f in self._node_futures if not f.done() or f.exception() is not None]
+        depends_on = list(self._node_futures)
+
+        # Mentioned pages may not be ingested yet: MERGE each distinct target once,
+        # in its own batch, instead of MERGE-ing the target on every link row
+        stub_targets = dict.fromkeys(l.target_uid for l in links_to_flush if l.stub_target)
+        if stub_targets:
+            stub_cypher = """
+            UNWIND $batch AS row
+            MERGE (n:Resource {uid: row.uid})
+            ON CREATE SET n:Title, n.title = row.uid, n.stub = true
+            """
+            depends_on += self._run_batch(stub_cypher, [{"uid": uid} for uid in stub_targets], label="Stubs",
+                                          depends_on=list(self._node_futures))
         cypher = """
         UNWIND $batch AS row
         MATCH (a:Resource {uid: row.source})
         MATCH (b:Resource {uid: row.target})
         MERGE (a)-[:LINK]->(b)
+        RETURN count(*) AS linked
         """
-        self._run_batch(cypher, batch_data, label="Links")
+        self._run_batch(cypher, batch_data, label="Links", depends_on=depends_on)
 
-    def _run_batch(self, cypher: str, batch: List[Dict[str, Any]], label: str):
+    def _run_batch(self, cypher: str, batch: List[Dict[str, Any]], label: str,
+                   depends_on: List[Future] = ()) -> List[Future]:
+        """
+        Submits the batch in sub-batches and returns their futures. Sub-batches
+        wait for the `depends_on` futures before writing; those must have been
+        submitted earlier, so the executor (which starts tasks in submission
+        order) has always picked them up first.
+        """
         # We split the batch into sub-batches and submit each as a background task
-        num_sub_batches = 0
+        futures = []
         for i in range(0, len(batch), self.batch_size):
             sub_batch = batch[i:i+self.batch_size]
-            logging.debug(f"Submitting sub-batch {i} for {label} (size: {len(sub_batch)})")
-            self._executor.submit(self._execute_with_semaphore, cypher, sub_batch, label, i)
-            num_sub_batches += 1
-        logging.debug(f"Submitted {num_sub_batches} total sub-batches for {label}.")
+            logging.debug("Submitting sub-batch %s for %s (size: %s)", i, label, len(sub_batch))
+            size = estimate_bytes(sub_batch)
+            self._acquire_inflight(size)
+            try:
+                future = self._executor.submit(self._execute_with_retries, cypher, sub_batch, label, i, size,
+                                               depends_on)
+            except BaseException:
+                self._release_inflight(size)
+                raise
+            self._futures.append(future)
+            future.add_done_callback(lambda _future, size=size: self._release_inflight(size))
+            future.add_done_callback(self._fire_barriers)
+            futures.append(future)
+        logging.debug("Submitted %s total sub-batches for %s.", len(futures), label)
+        return futures
+
+    def _acquire_inflight(self, size: int):
+        """Blocks until the sub-batch fits within the in-flight limits. A sub-batch is always let through when nothing else is in flight."""
+        with self._inflight:
+            if self._inflight_fits(size):
+                self._reserve_inflight(size)
+                return
+            start = time.perf_counter()
+            logging.debug("Write backlog full (%s batches, %s bytes), waiting...", self._inflight_batches, self._inflight_bytes)
+            while not self._inflight_fits(size):
+                self._inflight.wait()
+            self._reserve_inflight(size)
+            self.backpressure_seconds += time.perf_counter() - start
 
-    def _execute_with_semaphore(self, cypher: str, sub_batch: List[Dict[str, Any]], label: str, index_offset: int):
-        logging.debug(f"Background task waiting for semaphore: {label} offset {index_offset}")
+    def _inflight_fits(self, size: int) -> bool:
+        return self._inflight_batches == 0 or (
+            self._inflight_batches < self.max_inflight_batches
+            and self._inflight_bytes + size <= self.max_inflight_bytes)
+
+    def _reserve_inflight(self, size: int):
+        self._inflight_batches += 1
+        self._inflight_bytes += size
+
+    def _release_inflight(self, size: int):
+        with self._inflight:
+            self._inflight_batches -= 1
+            self._inflight_bytes -= size
+            self._inflight.notify_all()
+
+    def _execute_with_retries(self, cypher: str, sub_batch: List[Dict[str, Any]], label: str, index_offset: int,
+                              size_bytes: int, depends_on: List[Future] = ()):
+        for attempt in range(self.write_retries + 1):
+            try:
+                if attempt == 0 and depends_on:
+                    wait(depends_on)
+                    if any(f.exception() is not None for f in depends_on):
+                        # Dead-lettered along with the nodes, so a replay restores both
+                        raise RuntimeError(f"{label} batch {index_offset} depends on a failed batch")
+                return self._execute_with_semaphore(cypher, sub_batch, label, index_offset, size_bytes)
+            except Exception as e:
+                if attempt < self.write_retries and _is_retryable(e):
+                    # Back off outside the semaphore, so other batches keep writing meanwhile
+                    delay = self.write_retry_backoff * 2 ** attempt
+                    logging.warning(f"Retrying {label} batch {index_offset} in {delay:.1f}s "
+                                    f"(attempt {attempt + 1}/{self.write_retries}): {e}")
+                    time.sleep(delay)
+                    continue
+                with self._dead_letter_lock:
+                    self.failed_batches += 1
+                self._dead_letter(cypher, sub_batch, label, e)
+                raise
+
+    def _dead_letter(self, cypher: str, sub_batch: List[Dict[str, Any]], label: str, error: Exception):
+        if not self.dead_letter_path:
+            return
+        entry = json.dumps({"label": label, "cypher": cypher, "batch": sub_batch, "error": repr(error)},
+                           default=_dead_letter_default)
+        with self._dead_letter_lock:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(entry + "\n")
+        logging.error(f"Wrote failed {label} batch ({len(sub_batch)} rows) to {self.dead_letter_path}")
+
+    @tracer.start_as_current_span("KGraphClient.replay_dead_letters")
+    def replay_dead_letters(self) -> int:
+        """
+        Re-sends every batch in the dead-letter file and waits for them. Batches
+        that fail again are written to a fresh dead-letter file. Returns the
+        number of batches replayed.
+        """
+        if not self.dead_letter_path:
+            return 0
+        replaying = self.dead_letter_path + ".replaying"
+        with self._dead_letter_lock:
+            if os.path.exists(self.dead_letter_path):
+                if os.path.exists(replaying):
+                    # Left over from an interrupted replay: replay both
+                    with open(self.dead_letter_path, "r", encoding="utf-8") as src, \
+                            open(replaying, "a", encoding="utf-8") as dst:
+                        dst.write(src.read())
+                    os.remove(self.dead_letter_path)
+                else:
+                    os.replace(self.dead_letter_path, replaying)
+        if not os.path.exists(replaying):
+            return 0
+        with open(replaying, "r", encoding="utf-8") as f:
+            entries = [json.loads(line, object_hook=_dead_letter_object_hook) for line in f if line.strip()]
+
+        with self._buffer_lock:
+            futures = []
+            for entry in entries:
+                # Links after the nodes they may refer to, as on the first attempt
+                depends_on = list(futures) if entry["label"] == "Links" else ()
+                futures.extend(self._run_batch(entry["cypher"], entry["batch"], label=entry["label"],
+                                               depends_on=depends_on))
+        wait(futures)
+        os.remove(replaying)
+
+        failed = sum(1 for f in futures if f.exception() is not None)
+        logging.info(f"Replayed {len(entries)} dead-lettered batch(es), {failed} sub-batch(es) failed again.")
+        return len(entries)
+
+    def _execute_with_semaphore(self, cypher: str, sub_batch: List[Dict[str, Any]], label: str, index_offset: int,
+                                size_bytes: int):
+        logging.debug("Background task waiting for semaphore: %s offset %s", label, index_offset)
         with self._semaphore:
-            logging.debug(f"Background task acquired semaphore: {label} offset {index_offset}")
+            logging.debug("Background task acquired semaphore: %s offset %s", label, index_offset)
             with tracer.start_as_current_span("neo4j_run_batch") as span:
                 span.set_attribute("neo4j.batch_label", label)
                 span.set_attribute("neo4j.batch_size", len(sub_batch))
-                
-                # Calculate size via JSON serialization
-                batch_json = json.dumps(sub_batch)
-                batch_size_bytes = len(batch_json.encode('utf-8'))
-                
+
+                if self.metrics_level == "full":
+                    # Exact payload size, at the cost of serializing the whole batch.
+                    # Only a metric, so it must never fail the write.
+                    try:
+                        batch_size_bytes = serialized_bytes(sub_batch)
+                    except Exception as e:
+                        logging.warning(f"Could not measure {label} batch {index_offset}, using the estimate: {e}")
+                        batch_size_bytes = size_bytes
+                elif self.metrics_level == "basic":
+                    # Estimated once at submit time for the in-flight limits
+                    batch_size_bytes = size_bytes
+                else:
+                    batch_size_bytes = None
+
                 start = time.perf_counter()
                 with tracer.start_as_current_span("neo4j_session_execute") as sub_span:
                     sub_span.set_attribute("neo4j.sub_batch_size", len(sub_batch))
-                    sub_span.set_attribute("neo4j.batch_size_bytes", batch_size_bytes)
-                    
+                    if batch_size_bytes is not None:
+                        sub_span.set_attribute("neo4j.batch_size_bytes", batch_size_bytes)
+
                     try:
                         with self._driver.session() as session:
-                            session.execute_write(lambda tx: tx.run(cypher, batch=sub_batch))
+                            records = session.execute_write(lambda tx: tx.run(cypher, batch=sub_batch).data())
                     except Exception as e:
                         logging.error(f"Failed to execute batch for {label}. Cypher: {cypher}")
                         logging.error(f"Batch sample (first 2): {sub_batch[:2]}")
                         # We don't want to swallow exceptions in background threads without at least logging
                         # and potentially crashing if they are critical.
                         raise e
-                
+
                 duration = time.perf_counter() - start
+                if records and "linked" in records[0]:
+                    dropped = len(sub_batch) - records[0]["linked"]
+                    span.set_attribute("neo4j.dropped_links", dropped)
+                    if dropped:
+                        logging.warning(f"{label} batch {index_offset}: {dropped} link(s) found no source or target node")
+                        with self._dropped_links_lock:
+                            self.dropped_links += dropped
                 latency_ms = duration * 1000
+                if batch_size_bytes is None:
+                    logging.info(
+                        f"Wrote {label} batch {index_offset}-{index_offset+len(sub_batch)} | "
+                        f"Latency: {latency_ms:.1f} ms"
+                    )
+                    return
+
                 throughput_mb_s = (batch_size_bytes / (1024 * 1024)) / duration if duration > 0 else 0
-                
                 logging.info(
                     f"Wrote {label} batch {index_offset}-{index_offset+len(sub_batch)} | "
                     f"Size: {batch_size_bytes/1024:.2f} KB | "
                     f"Latency: {latency_ms:.1f} ms | "
                     f"Throughput: {throughput_mb_s:.2f} MB/s"
                 )
+
+def estimate_bytes(rows: List[Dict[str, Any]]) -> int:
+    """
+    Rough in-memory size of a batch: string and byte lengths, array buffers, 8
+    bytes per number and per list element, plus the keys. Cheap enough to run on
+    every sub-batch, unlike serializing it.
+    """
+    total = 0
+    for row in rows:
+        for key, value in row.items():
+            total += len(key)
+            if isinstance(value, (str, bytes)):
+                total += len(value)
+            elif isinstance(value, np.ndarray):
+                total += value.nbytes
+            elif isinstance(value, (list, tuple)):
+                total += 8 * len(value)
+            else:
+                total += 8
+    return total
+
+
+def serialized_bytes(rows: List[Dict[str, Any]]) -> int:
+    """Exact JSON size of a batch, with bytes values (float16/int8 embeddings) counted at their raw length."""
+    raw = 0
+
+    def default(value):
+        nonlocal raw
+        if isinstance(value, bytes):
+            raw += len(value)
+            return ""
+        return _json_default(value)
+
+    return len(json.dumps(rows, default=default).encode('utf-8')) + raw
+
+
+def _is_retryable(error: Exception) -> bool:
+    return isinstance(error, (Neo4jError, DriverError)) and error.is_retryable()
+
+
+def _dead_letter_default(value):
+    # Byte-array embeddings (float16/int8) must come back as bytes on replay
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    return _json_default(value)
+
+
+def _dead_letter_object_hook(obj: Dict[str, Any]):
+    if obj.keys() == {"__bytes__"}:
+        return base64.b64decode(obj["__bytes__"])
+    return obj
+
+
+def _json_default(value):
+    # Embeddings are ndarrays until the driver packs them
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -1,5 +1,6 @@
 import os
 from dataclasses import dataclass
+from typing import Tuple
 
 @dataclass
 class Config:
@@ -8,6 +9,51 @@ class Config:
     neo4j_password: str = os.getenv("NEO4J_PASSWORD", "password")
     batch_size: int = int(os.getenv("BATCH_SIZE", "5000"))
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    # Empty disables the persistent embedding cache
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "")
+    embedding_max_batch_tokens: int = int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "16384"))
+    embedding_max_batch_size: int = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "256"))
+    embedding_cache_lru_size: int = int(os.getenv("EMBEDDING_CACHE_LRU_SIZE", "100000"))
+    # Storage format of node embeddings: float32, float16 or int8 (see kgraph2.quantization)
+    embedding_dtype: str = os.getenv("EMBEDDING_DTYPE", "float32")
+    # sentence-transformers backend: torch, onnx or openvino
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    # Encoder processes, each pinned to a slice of the cores; 1 encodes in-process
+    embedding_workers: int = int(os.getenv("EMBEDDING_WORKERS", "1"))
     max_concurrency: int = int(os.getenv("MAX_CONCURRENCY", "4"))
+    # Limits on submitted but unfinished Neo4j sub-batches; writers block beyond them
+    max_inflight_batches: int = int(os.getenv("MAX_INFLIGHT_BATCHES", "8"))
+    max_inflight_bytes: int = int(os.getenv("MAX_INFLIGHT_BYTES", str(256 * 1024 * 1024)))
+    # Neo4j batch byte metrics: off, basic (estimated) or full (exact, serializes every batch)
+    metrics_level: str = os.getenv("METRICS_LEVEL", "basic")
+    # Retries of a failed Neo4j sub-batch on retryable errors, with exponential backoff from write_retry_backoff seconds
+    write_retries: int = int(os.getenv("WRITE_RETRIES", "3"))
+    write_retry_backoff: float = float(os.getenv("WRITE_RETRY_BACKOFF", "1.0"))
+    # JSONL file collecting sub-batches that still failed; empty disables it
+    dead_letter_path: str = os.getenv("DEAD_LETTER_PATH", "kgraph_dead_letter.jsonl")
+    parser_engine: str = os.getenv("PARSER_ENGINE", "mwparserfromhell")
+    parser_workers: int = int(os.getenv("PARSER_WORKERS", str(os.cpu_count() or 1)))
+    # Texts buffered before each embedding call
+    embed_batch_size: int = int(os.getenv("EMBED_BATCH_SIZE", "1024"))
+    # Capacity of each queue between pipeline stages
+    pipeline_queue_size: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "256"))
+    checkpoint_path: str = os.getenv("CHECKPOINT_PATH", "kgraph_checkpoint.json")
 
 DEFAULT_CONFIG = Config()
+
+@dataclass(frozen=True)
+class ChunkingConfig:
+    chunk_size: int = int(os.getenv("CHUNK_SIZE", "1000"))
+    chunk_overlap: int = int(os.getenv("CHUNK_OVERLAP", "100"))
+    separators: Tuple[str, ...] = ("\n\n", "\n", " ", "")
+
+DEFAULT_CHUNKING = ChunkingConfig()
+
+@dataclass(frozen=True)
+class ChunkFilterConfig:
+    # Paragraphs with less plain text than this are not embedded
+    min_prose_chars: int = int(os.getenv("MIN_PROSE_CHARS", "40"))
+    skip_template_only: bool = os.getenv("SKIP_TEMPLATE_ONLY", "1") == "1"
+    skip_category_only: bool = os.getenv("SKIP_CATEGORY_ONLY", "1") == "1"
+
+DEFAULT_CHUNK_FILTER = ChunkFilterConfig()
@@ -0,0 +1,103 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+import numpy as np
+
+# SQLite's default limit on host parameters per statement is 999 on older builds
+_SQL_CHUNK = 900
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, model_name: str, lru_size: int = 100_000):
+        """
+        Persistent, content-addressed embedding cache.
+
+        Vectors are stored as float32 blobs in SQLite, keyed by (model name, hash of
+        the text), with an in-memory LRU in front. Re-running the pipeline over the
+        same or a newer dump only pays the model cost for text that changed.
+
+        Args:
+            path (str): SQLite database file. Created if missing.
+            model_name (str): Embedding model. Vectors from different models never mix.
+            lru_size (int): Number of vectors kept in the in-memory LRU.
+        """
+        self.path = path
+        self.model_name = model_name
+        self.lru_size = lru_size
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, hash)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Returns the cached vector for each text, or None on a miss."""
+        keys = [self.key(t) for t in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        with self._lock:
+            missing = {}
+            for i, k in enumerate(keys):
+                vec = self._lru.get(k)
+                if vec is not None:
+                    self._lru.move_to_end(k)
+                    results[i] = vec
+                else:
+                    missing.setdefault(k, []).append(i)
+
+            missing_keys = list(missing)
+            for start in range(0, len(missing_keys), _SQL_CHUNK):
+                chunk = missing_keys[start:start + _SQL_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(chunk))})",
+                    [self.model_name, *chunk],
+                ).fetchall()
+                for k, blob in rows:
+                    vec = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(k, vec)
+                    for i in missing[k]:
+                        results[i] = vec
+
+            hits = sum(1 for r in results if r is not None)
+            self.hits += hits
+            self.misses += len(texts) - hits
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        with self._lock:
+            rows = []
+            for text, vector in zip(texts, vectors):
+                k = self.key(text)
+                vec = np.asarray(vector, dtype=np.float32)
+                self._remember(k, vec)
+                rows.append((self.model_name, k, vec.tobytes()))
+            self._conn.executemany("INSERT OR IGNORE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+    def _remember(self, k: bytes, vec: np.ndarray):
+        """Adds a vector to the LRU. Assumes _lock is held."""
+        self._lru[k] = vec
+        self._lru.move_to_end(k)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,20 +1,272 @@
-from typing import List
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+import numpy as np
 from .config import DEFAULT_CONFIG
-from sentence_transformers import SentenceTransformer
+from opentelemetry import trace
+from .embedding_cache import EmbeddingCache
 from .tracing import get_tracer
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 tracer = get_tracer(__name__)
 
+# sentence-transformers inference backends; onnx and openvino need this
+# package's onnx / openvino extras
+EMBEDDING_BACKENDS = ("torch", "onnx", "openvino")
+
 class EmbeddingClient:
-    def __init__(self, model_name: str = DEFAULT_CONFIG.embedding_model):
+    def __init__(self, model_name: str = DEFAULT_CONFIG.embedding_model,
+                 cache: Optional[EmbeddingCache] = None,
+                 max_batch_tokens: int = DEFAULT_CONFIG.embedding_max_batch_tokens,
+                 max_batch_size: int = DEFAULT_CONFIG.embedding_max_batch_size,
+                 workers: int = DEFAULT_CONFIG.embedding_workers,
+                 backend: str = DEFAULT_CONFIG.embedding_backend):
+        """
+        Args:
+            model_name (str): SentenceTransformer model to load, a hub name or a
+                local directory (e.g. one with an exported onnx/ or openvino/ model).
+            cache (EmbeddingCache): Optional persistent cache. Only cache misses are
+                sent to the model.
+            max_batch_tokens (int): Padded token budget of one model batch
+                (longest text in the batch * batch size).
+            max_batch_size (int): Upper bound on texts per model batch.
+            workers (int): Encoder processes. With more than one, each worker loads
+                the model once, is pinned to its own slice of the CPU cores and
+                receives model batches round-robin. Call close() to stop them.
+            backend (str): "torch" (default), "onnx" or "openvino". ONNX Runtime and
+                OpenVINO load an exported model from the model repository or
+                directory, or export one on the fly when there is none.
+
+        The model (and sentence_transformers/torch) is loaded on first use, so
+        runs that never embed anything do not pay for it.
+        """
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
         self.model_name = model_name
-        self.model = SentenceTransformer(self.model_name)
+        self.backend = backend
+        self._model = None
+        self.cache = cache
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.last_dedup_ratio = 0.0
+        self._pool = EncoderPool(self.model_name, workers, backend) if workers > 1 else None
+
+    @property
+    def model(self) -> "SentenceTransformer":
+        if self._model is None:
+            self._model = load_model(self.model_name, self.backend)
+        return self._model
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
 
     @tracer.start_as_current_span("EmbeddingClient.get_embedding")
-    def get_embedding(self, text: str) -> List[float]:
-        return self.model.encode(text, show_progress_bar=False).tolist()
+    def get_embedding(self, text: str) -> np.ndarray:
+        """Encodes one text through get_embeddings(), so it goes through the cache and the encoder pool too."""
+        return self.get_embeddings([text])[0]
 
     @tracer.start_as_current_span("EmbeddingClient.get_embeddings")
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        return self.model.encode(texts, show_progress_bar=False).tolist()
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes texts, computing each distinct string only once per call.
+        Wikipedia repeats a lot of text ("== References ==", boilerplate templates),
+        so identical inputs are deduplicated and the vectors scattered back.
+
+        Returns one contiguous (len(texts), dim) float32 array. Rows are meant to be
+        stored on Nodes as views; the Neo4j driver packs ndarrays directly, so the
+        vectors are never expanded into lists of Python floats.
+        """
+        unique, inverse = dedupe(texts)
+        self.last_dedup_ratio = 1 - len(unique) / len(texts) if texts else 0.0
+
+        span = trace.get_current_span()
+        span.set_attribute("embedding.batch_size", len(texts))
+        span.set_attribute("embedding.unique_texts", len(unique))
+        span.set_attribute("embedding.dedup_ratio", self.last_dedup_ratio)
+
+        vectors = self._encode_unique(unique)
+        return vectors[inverse]
+
+    def _encode_unique(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        if self.cache is None:
+            return self._encode(texts)
+
+        vectors = self.cache.get_many(texts)
+        misses = [i for i, vec in enumerate(vectors) if vec is None]
+        if misses:
+            encoded = self._encode([texts[i] for i in misses])
+            self.cache.put_many([texts[i] for i in misses], encoded)
+            for i, vec in zip(misses, encoded):
+                vectors[i] = vec
+
+        span = trace.get_current_span()
+        span.set_attribute("embedding.cache_hits", len(texts) - len(misses))
+        span.set_attribute("embedding.cache_misses", len(misses))
+        span.set_attribute("embedding.cache_hits_total", self.cache.hits)
+        span.set_attribute("embedding.cache_misses_total", self.cache.misses)
+        return np.stack(vectors)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes texts in length buckets. encode() already sorts a call by length,
+        but it uses a fixed batch size, so a call with 5-char headings and 1000-char
+        paragraphs gets the same small batches throughout. Here each sub-batch is
+        sized to a padded token budget, so short texts go through in large batches.
+        """
+        # With a pool the model only lives in the workers, so the parent never loads it
+        model_max = self._pool.max_seq_length if self._pool is not None else getattr(self.model, "max_seq_length", None)
+        max_tokens = model_max or 512
+        lengths = [min(estimate_tokens(t), max_tokens) for t in texts]
+        buckets = length_buckets(lengths, self.max_batch_tokens, self.max_batch_size)
+
+        span = trace.get_current_span()
+        span.set_attribute("embedding.model_batches", len(buckets))
+
+        batches = [[texts[i] for i in bucket] for bucket in buckets]
+        if self._pool is not None:
+            results = self._pool.map(batches)
+        else:
+            results = (self.model.encode(batch, batch_size=len(batch), show_progress_bar=False)
+                       for batch in batches)
+
+        vectors = None
+        for bucket, encoded in zip(buckets, results):
+            if vectors is None:
+                vectors = np.empty((len(texts), encoded.shape[1]), dtype=encoded.dtype)
+            vectors[bucket] = encoded
+        return vectors
+
+
+@tracer.start_as_current_span("load_model")
+def load_model(model_name: str, backend: str = "torch", threads: Optional[int] = None) -> "SentenceTransformer":
+    """Loads the model; `threads` caps the intra-op threads of the backend's own runtime."""
+    from sentence_transformers import SentenceTransformer
+    model_kwargs = backend_thread_kwargs(backend, threads) if threads else None
+    return SentenceTransformer(model_name, backend=backend, model_kwargs=model_kwargs)
+
+
+def backend_thread_kwargs(backend: str, threads: int) -> Dict[str, object]:
+    """
+    model_kwargs that size the inference thread pool of ONNX Runtime or OpenVINO,
+    which torch.set_num_threads() does not reach. Empty for torch.
+    """
+    if backend == "onnx":
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        return {"session_options": options}
+    if backend == "openvino":
+        return {"ov_config": {"INFERENCE_NUM_THREADS": threads}}
+    return {}
+
+
+class EncoderPool:
+    def __init__(self, model_name: str, workers: int, backend: str = "torch"):
+        """
+        A fixed set of single-process executors, one per worker, so that batches
+        can be dealt out round-robin. Every worker loads the model once and is
+        pinned to its own slice of the available cores, with torch and the
+        inference backend using one thread per core in that slice; one encode()
+        call on its own does not keep all cores busy for a model as small as
+        all-MiniLM-L6-v2.
+
+        Workers are spawned rather than forked, since the parent has usually
+        started torch's thread pools already.
+        """
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+        context = multiprocessing.get_context("spawn")
+        self._executors = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_encoder_worker,
+                                initargs=(model_name, backend, core_slice(cores, i, workers)))
+            for i in range(workers)
+        ]
+        self._max_seq_length = None
+
+    @property
+    def max_seq_length(self) -> Optional[int]:
+        """The model's max_seq_length, asked of the first worker once."""
+        if self._max_seq_length is None:
+            self._max_seq_length = self._executors[0].submit(_max_seq_length_in_worker).result() or 0
+        return self._max_seq_length or None
+
+    def map(self, batches: List[List[str]]) -> List[np.ndarray]:
+        """Encodes batches on the workers round-robin and returns the results in input order."""
+        futures = [self._executors[i % len(self._executors)].submit(_encode_in_worker, batch)
+                   for i, batch in enumerate(batches)]
+        return [future.result() for future in futures]
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown()
+
+
+def core_slice(cores: Sequence[int], index: int, workers: int) -> List[int]:
+    """Splits cores into `workers` contiguous slices and returns slice `index`. Slices are shared when there are more workers than cores."""
+    if workers >= len(cores):
+        return [cores[index % len(cores)]]
+    start = index * len(cores) // workers
+    end = (index + 1) * len(cores) // workers
+    return list(cores[start:end])
+
+
+# Model loaded once per encoder worker process
+_worker_model = None
+
+def _init_encoder_worker(model_name: str, backend: str, cores: List[int]):
+    global _worker_model
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    # Pooling and normalization run in torch whatever the backend
+    import torch
+    torch.set_num_threads(len(cores))
+    _worker_model = load_model(model_name, backend, threads=len(cores))
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+
+def _max_seq_length_in_worker() -> Optional[int]:
+    return getattr(_worker_model, "max_seq_length", None)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token count estimate (~4 characters per token), plus [CLS]/[SEP]."""
+    return len(text) // 4 + 2
+
+
+def length_buckets(lengths: List[int], max_batch_tokens: int, max_batch_size: int) -> List[np.ndarray]:
+    """
+    Groups indices into batches of similar length, longest first. A batch grows
+    while (its longest length * its size) stays within max_batch_tokens, which
+    bounds the padded tensor each model call has to process.
+    """
+    order = np.argsort(lengths, kind="stable")[::-1]
+    buckets, current = [], []
+    for i in order:
+        # Sorted longest first, so the first index of a batch sets its padded length
+        if current and (lengths[current[0]] * (len(current) + 1) > max_batch_tokens
+                        or len(current) >= max_batch_size):
+            buckets.append(np.array(current, dtype=np.intp))
+            current = []
+        current.append(i)
+    if current:
+        buckets.append(np.array(current, dtype=np.intp))
+    return buckets
+
+
+def dedupe(texts: List[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Returns the distinct texts in first-seen order, and for each input the index
+    of its distinct text, so that `unique_vectors[inverse]` restores input order.
+    """
+    positions: Dict[str, int] = {}
+    inverse = np.fromiter((positions.setdefault(t, len(positions)) for t in texts),
+                          dtype=np.intp, count=len(texts))
+    return list(positions), inverse
 show_progress_bar=False
\ No newline at end of file
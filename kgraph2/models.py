@@ -1,7 +1,14 @@
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Iterator
+from typing import List, Optional, Dict, Any, Iterator, BinaryIO, Tuple, Set
 from enum import Enum
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import bz2
+import io
+import multiprocessing
+import os
 import mwxml
+import mwtypes
 import re
 
 
@@ -22,6 +29,16 @@ class Link:
     source_uid: str
     target_uid: str
     # property-free as requested
+    # Target is a page title that may not be ingested (yet, or in this shard at all);
+    # the writer creates a stub Title node for it when missing
+    stub_target: bool = False
+
+# Matches [[target]] or [[target|text]] patterns
+LINK_RE = re.compile(r'\[\[([^\]|]+)(?:\|[^\]]*)?\]\]')
+
+def find_link_spans(text: str) -> List[Tuple[int, str]]:
+    """Returns (character offset, target) for every wiki link in text, in order."""
+    return [(m.start(), m.group(1)) for m in LINK_RE.finditer(text)]
 
 @dataclass
 class Chunk:
@@ -30,16 +47,20 @@ class Chunk:
     type: NodeType
     hierarchy_owner: str
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # (offset in content, target) of each wiki link, recorded by the parser
+    link_spans: Optional[List[Tuple[int, str]]] = None
+    # Content with the wiki markup stripped, used for embedding; content keeps the raw wikitext
+    plain_text: Optional[str] = None
 
     def get_links(self) -> List[str]:
         """
         Extracts Wikipedia links (double brackets) from the content.
         Returns a unique list of linked page titles.
+        Uses the link spans recorded by the parser when available instead of rescanning.
         """
-        # Find all [[target]] or [[target|text]] patterns
-        matches = re.findall(r'\[\[([^\]|]+)(?:\|[^\]]*)?\]\]', self.content)
-        # Use a set to ensure uniqueness, then back to a list
-        return list(set(matches))
+        spans = self.link_spans if self.link_spans is not None else find_link_spans(self.content)
+        # Unique, in order of first mention
+        return list(dict.fromkeys(target for _, target in spans))
 
 @dataclass
 class Page:
@@ -48,33 +69,161 @@ class Page:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass(frozen=True)
+class Checkpoint:
+    """Resumable position in a dump: last fully committed page, plus its bz2 stream offset for multistream dumps."""
+    page_id: int
+    stream_offset: Optional[int] = None
+
+    @classmethod
+    def from_page(cls, page: Page) -> "Checkpoint":
+        return cls(page_id=int(page.metadata["page_id"]), stream_offset=page.metadata.get("stream_offset"))
+
+@dataclass(frozen=True)
+class Redirect:
+    title: str
+    target: str
+
+
+XML_ENGINES = ("mwxml", "lxml")
+
+
 class XMLMultiPageDoc:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, engine: str = "mwxml",
+                 namespaces: Optional[Set[int]] = None,
+                 skip_redirects: bool = False,
+                 skip_title_prefixes: Tuple[str, ...] = (),
+                 resume_from: Optional[Checkpoint] = None):
+        """
+        Iterates over the pages of an uncompressed MediaWiki XML dump.
+
+        Filters are applied from the page header (ns, title, redirect) before the
+        revision text is read, so skipped pages never become Page objects.
+
+        Args:
+            file_path (str): Path to the XML dump.
+            engine (str): "mwxml" (default) builds full mwxml objects and walks every
+                revision. "lxml" streams <page> elements with lxml.etree.iterparse,
+                reads only the fields needed for a Page and frees each element once
+                processed. It is much faster for pages-articles dumps.
+            namespaces (Set[int]): Namespace ids to keep, e.g. {0} for articles only.
+                None keeps every namespace.
+            skip_redirects (bool): If True, redirect pages are not yielded. They are
+                recorded as Redirect(title, target) aliases in `self.redirects` instead.
+            skip_title_prefixes (Tuple[str, ...]): Pages whose title starts with any
+                of these prefixes are skipped.
+            resume_from (Checkpoint): Skip every page up to and including
+                `resume_from.page_id`. Dumps are ordered by page id.
+        """
+        if engine not in XML_ENGINES:
+            raise ValueError(f"Unknown XML engine '{engine}', expected one of {XML_ENGINES}")
         self.file_path = file_path
+        self.engine = engine
+        self.namespaces = set(namespaces) if namespaces is not None else None
+        self.skip_redirects = skip_redirects
+        self.skip_title_prefixes = tuple(skip_title_prefixes)
+        self.resume_from = resume_from
+        self.redirects: List[Redirect] = []
 
     def __iter__(self) -> Iterator[Page]:
         with open(self.file_path, "rb") as f:
-            dump = mwxml.Dump.from_file(f)
-
-            for page in dump:
-                # skip empty pages
-                if page.id is None:
-                    continue
-
-                revision = self._latest_revision(page)
-                if revision is None:
-                    continue
-
-                yield Page(
-                    title=page.title,
-                    raw_content=revision.text or "",
-                    metadata={
-                        "page_id": page.id,
-                        "revision_id": revision.id,
-                        "timestamp": revision.timestamp,
-                        "redirect": page.redirect
-                    },
-                )
+            yield from self._iter_file(f)
+
+    def _iter_file(self, f: BinaryIO) -> Iterator[Page]:
+        if self.engine == "lxml":
+            return self._iter_file_lxml(f)
+        return self._iter_file_mwxml(f)
+
+    def _accept(self, page_id: int, namespace: int, title: str, redirect: Optional[str]) -> bool:
+        """Applies the resume cursor and the namespace, title prefix and redirect filters to a page header."""
+        if self.resume_from is not None and page_id <= self.resume_from.page_id:
+            return False
+        if self.namespaces is not None and namespace not in self.namespaces:
+            return False
+        if self.skip_title_prefixes and title.startswith(self.skip_title_prefixes):
+            return False
+        if redirect is not None and self.skip_redirects:
+            # Keep the redirect as a cheap alias instead of chunking/embedding its stub text
+            self.redirects.append(Redirect(title=title, target=redirect))
+            return False
+        return True
+
+    def _iter_file_lxml(self, f: BinaryIO) -> Iterator[Page]:
+        # Imported here so the default engine does not pay for lxml
+        from lxml import etree
+
+        # "{*}" matches any export schema version (export-0.10, export-0.11, ...)
+        for _, elem in etree.iterparse(f, events=("end",), tag="{*}page"):
+            page = self._page_from_element(elem)
+            if page is not None:
+                yield page
+
+            # Free the page subtree and any already-processed siblings so memory stays flat
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    def _page_from_element(self, elem) -> Optional[Page]:
+        page_id = elem.findtext("{*}id")
+        # skip empty pages
+        if page_id is None:
+            return None
+        page_id = int(page_id)
+
+        title = elem.findtext("{*}title")
+        redirect_elem = elem.find("{*}redirect")
+        redirect = redirect_elem.get("title") if redirect_elem is not None else None
+        if not self._accept(page_id, int(elem.findtext("{*}ns", "0")), title, redirect):
+            return None
+
+        # Same semantics as _latest_revision: last revision carrying text
+        revision, text = None, None
+        for rev in elem.iterfind("{*}revision"):
+            rev_text = rev.find("{*}text")
+            if rev_text is None or rev_text.text is None:
+                continue
+            revision, text = rev, rev_text.text
+
+        if revision is None:
+            return None
+
+        timestamp = revision.findtext("{*}timestamp")
+        return Page(
+            title=title,
+            raw_content=text,
+            metadata={
+                "page_id": page_id,
+                "revision_id": int(revision.findtext("{*}id")),
+                "timestamp": mwtypes.Timestamp(timestamp) if timestamp else None,
+                "redirect": redirect
+            },
+        )
+
+    def _iter_file_mwxml(self, f: BinaryIO) -> Iterator[Page]:
+        dump = mwxml.Dump.from_file(f)
+
+        for page in dump:
+            # skip empty pages
+            if page.id is None:
+                continue
+
+            if not self._accept(page.id, page.namespace, page.title, page.redirect):
+                continue
+
+            revision = self._latest_revision(page)
+            if revision is None:
+                continue
+
+            yield Page(
+                title=page.title,
+                raw_content=revision.text or "",
+                metadata={
+                    "page_id": page.id,
+                    "revision_id": revision.id,
+                    "timestamp": revision.timestamp,
+                    "redirect": page.redirect
+                },
+            )
 
     @staticmethod
     def _latest_revision(page: mwxml.Page) -> mwxml.Revision | None:
@@ -83,4 +232,132 @@ class XMLMultiPageDoc:
             if rev.text is None:
                 continue
             latest = rev
-        return latest
\ No newline at end of file
+        return latest
+
+
+def read_multistream_offsets(index_path: str) -> List[int]:
+    """
+    Reads a `*-multistream-index.txt.bz2` file and returns the sorted, unique
+    byte offsets of the bz2 streams it references.
+
+    Each index line has the form `offset:page_id:title`, with one line per page
+    and roughly 100 pages sharing the same stream offset.
+    """
+    offsets = set()
+    with bz2.open(index_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            offset, _, _ = line.partition(":")
+            if offset:
+                offsets.add(int(offset))
+    return sorted(offsets)
+
+
+def _parse_stream(file_path: str, header: bytes, start: int, end: int,
+                  doc_options: Dict[str, Any]) -> Tuple[List[Page], List[Redirect]]:
+    """
+    Process pool worker: decompresses the bz2 stream(s) in [start, end) and parses
+    the contained <page> elements. The dump header (<mediawiki> + <siteinfo>) is
+    prepended so that each stream can be parsed as a standalone document.
+
+    Returns the pages, tagged with their `stream_offset`, and the redirect
+    aliases collected while filtering.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        compressed = f.read(end - start)
+
+    # bz2.decompress handles concatenated streams, which matters for the last
+    # indexed stream since the closing </mediawiki> lives in its own stream.
+    body = bz2.decompress(compressed).rstrip()
+    if body.endswith(b"</mediawiki>"):
+        body = body[:-len(b"</mediawiki>")]
+
+    xml = header + body + b"\n</mediawiki>\n"
+    doc = XMLMultiPageDoc(file_path, **doc_options)
+    pages = list(doc._iter_file(io.BytesIO(xml)))
+    for page in pages:
+        page.metadata["stream_offset"] = start
+    return pages, doc.redirects
+
+
+class MultistreamDumpReader:
+    def __init__(self, file_path: str, index_path: str,
+                 workers: Optional[int] = None, max_inflight: Optional[int] = None,
+                 engine: str = "mwxml",
+                 namespaces: Optional[Set[int]] = None,
+                 skip_redirects: bool = False,
+                 skip_title_prefixes: Tuple[str, ...] = (),
+                 resume_from: Optional[Checkpoint] = None):
+        """
+        Reads a `pages-articles-multistream*.xml.bz2` dump in parallel.
+
+        The multistream index is used to split the file into independent bz2
+        streams, which are decompressed and parsed in a process pool. Pages are
+        yielded in dump order.
+
+        Args:
+            file_path (str): Path to the `.xml.bz2` multistream dump.
+            index_path (str): Path to the matching `-index.txt.bz2` file.
+            workers (int): Number of worker processes. Defaults to the CPU count.
+            max_inflight (int): Maximum number of streams submitted but not yet
+                consumed. Bounds memory use. Defaults to 2 * workers.
+            engine (str): XML engine used to parse each stream, see XMLMultiPageDoc.
+            namespaces, skip_redirects, skip_title_prefixes: Page filters applied in
+                the workers, see XMLMultiPageDoc. Redirect aliases are collected in
+                `self.redirects` as their streams are consumed.
+            resume_from (Checkpoint): Streams before `resume_from.stream_offset` are
+                never read, and pages up to `resume_from.page_id` are skipped.
+        """
+        if engine not in XML_ENGINES:
+            raise ValueError(f"Unknown XML engine '{engine}', expected one of {XML_ENGINES}")
+        self.file_path = file_path
+        self.index_path = index_path
+        self.workers = workers or os.cpu_count() or 1
+        self.max_inflight = max_inflight or 2 * self.workers
+        self.doc_options = {
+            "engine": engine,
+            "namespaces": namespaces,
+            "skip_redirects": skip_redirects,
+            "skip_title_prefixes": tuple(skip_title_prefixes),
+            "resume_from": resume_from,
+        }
+        self.resume_from = resume_from
+        self.redirects: List[Redirect] = []
+
+    def _stream_bounds(self) -> Tuple[bytes, List[Tuple[int, int]]]:
+        offsets = read_multistream_offsets(self.index_path)
+        if not offsets:
+            raise ValueError(f"No streams found in multistream index: {self.index_path}")
+
+        file_size = os.path.getsize(self.file_path)
+
+        # Everything before the first indexed stream is the <mediawiki>/<siteinfo> header
+        with open(self.file_path, "rb") as f:
+            header = bz2.decompress(f.read(offsets[0]))
+
+        ends = offsets[1:] + [file_size]
+        bounds = list(zip(offsets, ends))
+        if self.resume_from is not None and self.resume_from.stream_offset is not None:
+            # Seek straight to the stream holding the last committed page
+            bounds = [(start, end) for start, end in bounds if start >= self.resume_from.stream_offset]
+        return header, bounds
+
+    def __iter__(self) -> Iterator[Page]:
+        header, bounds = self._stream_bounds()
+
+        # Spawned, not forked: the pool is started from a pipeline stage thread
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            window = deque()
+            for start, end in bounds:
+                window.append(pool.submit(_parse_stream, self.file_path, header, start, end, self.doc_options))
+                # Keep at most max_inflight streams decompressed in memory
+                if len(window) >= self.max_inflight:
+                    yield from self._consume(window.popleft())
+
+            while window:
+                yield from self._consume(window.popleft())
+
+    def _consume(self, future) -> Iterator[Page]:
+        pages, redirects = future.result()
+        self.redirects.extend(redirects)
+        yield from pages
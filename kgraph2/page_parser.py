@@ -1,21 +1,405 @@
 import mwparserfromhell
-from typing import Iterator, List
-from .models import Page, Chunk, NodeType
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import bisect
+import heapq
+import html
+import logging
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from .models import Page, Chunk, NodeType, find_link_spans
+from .config import ChunkingConfig, DEFAULT_CHUNKING
 from .tracing import get_tracer
 
+if TYPE_CHECKING:
+    # langchain_text_splitters imports sentence_transformers and torch, so it is only loaded when a splitter is built
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
 tracer = get_tracer(__name__)
 
+@lru_cache(maxsize=None)
+def get_text_splitter(config: ChunkingConfig = DEFAULT_CHUNKING) -> "RecursiveCharacterTextSplitter":
+    """
+    Returns the text splitter for a chunking config, built once per process.
+    The splitter is stateless, so a single instance is shared by every PageParser.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        chunk_size=config.chunk_size,
+        chunk_overlap=config.chunk_overlap,
+        separators=list(config.separators),
+        length_function=len,
+        is_separator_regex=False,
+    )
+
+PARSER_ENGINES = ("mwparserfromhell", "regex")
+
+# Inline markup that may contain "=" without opening or closing a heading
+_MARKUP = r"<!--[^\n]*?-->|<nowiki\b[^>\n]*>[^\n]*?</nowiki\s*>|<[^>\n]*>|\{\{[^}\n]*\}\}|\[\[[^\]\n]*\]\]"
+
+# A heading line: "== Title ==". Like mwparserfromhell, the heading closes at the
+# last "=" run on the line outside of tags, templates and links, and anything
+# after it is ordinary text. The level is the shorter "=" run; extra "=" belong
+# to the title.
+HEADING_RE = re.compile(
+    rf"^(=+)((?>{_MARKUP}|[^\n])+?)(=+)(?=(?>{_MARKUP}|[^=\n])*$)",
+    re.MULTILINE,
+)
+
+# Regions in which mwparserfromhell never sees a heading: comments and tags whose
+# content it does not parse, and templates, links, tables and paired tags, found
+# from the openers and closers matched here by opaque_spans(). A flat alternation
+# of literals, so the scan can skip ahead to candidate characters.
+OPAQUE_RE = re.compile(r"\{\{|\}\}|\[\[|\]\]|<!--|<(/?)([a-z][a-z0-9]*)\b[^<>]*>", re.IGNORECASE)
+# Tables open and close at the start of a line, which is kept out of OPAQUE_RE
+_TABLE_EDGE_RE = re.compile(r"^[ \t]*(?:(\{\|)|\|\})", re.MULTILINE)
+# Tags whose content is not parsed, and tags that never take a closing tag
+_RAW_TAGS = frozenset(("nowiki", "pre", "math", "syntaxhighlight", "source", "gallery", "categorytree", "ce", "chem",
+                       "graph", "hiero", "imagemap", "inputbox", "score", "section", "templatedata", "timeline"))
+_SINGLE_ONLY_TAGS = frozenset(("br", "wbr", "hr", "meta", "link", "img"))
+_CLOSER_OF = {"}}": "{{", "]]": "[["}
+_OPENERS = frozenset(("{{", "[["))
+# Characters mwparserfromhell does not accept in a link title or template name
+_LINK_TITLE_BAD_RE = re.compile(r"[\n\[\]{}<>]")
+_TEMPLATE_NAME_BAD_RE = re.compile(r"[\[\]<>]")
+# Progress through a template name: nothing yet, some text, a line break after the text
+_NAME_EMPTY, _NAME_TEXT, _NAME_LINE_END = range(3)
+
+
+@lru_cache(maxsize=None)
+def _raw_tag_end_re(tag: str) -> re.Pattern:
+    return re.compile(rf"</{tag}\s*>", re.IGNORECASE)
+
+
+def _nesting_tokens(text: str) -> List[Tuple[Optional[str], bool, int, int]]:
+    """
+    (construct, opens, start, end) of every opener and closer in text. construct
+    is "{{", "[[", "{|" or "<tag", or None for a comment or unparsed tag taken whole.
+    """
+    tokens = []
+    # End of the last comment or unparsed tag; anything inside it is text
+    skip = 0
+    for match in OPAQUE_RE.finditer(text):
+        start = match.start()
+        if start < skip:
+            continue
+        token = match.group()
+        if token == "<!--":
+            end = text.find("-->", start + 4)
+            # An unclosed comment is text
+            if end >= 0:
+                skip = end + 3
+                tokens.append((None, False, start, skip))
+            continue
+        closing, tag = match.group(1, 2)
+        if tag is None:
+            tokens.append((_CLOSER_OF.get(token, token), token in _OPENERS, start, match.end()))
+            continue
+        tag = tag.lower()
+        if (tag in _SINGLE_ONLY_TAGS or token.endswith("/>")) and not closing:
+            continue
+        if tag in _RAW_TAGS and not closing:
+            raw_end = _raw_tag_end_re(tag).search(text, match.end())
+            if raw_end is not None:
+                skip = raw_end.end()
+                tokens.append((None, False, start, skip))
+                continue
+        tokens.append(("<" + tag, not closing, start, match.end()))
+    if "{|" not in text:
+        return tokens
+
+    # Merge in the table edges, dropping tokens that overlap an earlier one
+    table_edges = (("{|", m.group(1) is not None, m.start(), m.end()) for m in _TABLE_EDGE_RE.finditer(text))
+    merged = []
+    for token in heapq.merge(tokens, table_edges, key=lambda t: t[2]):
+        if not merged or token[2] >= merged[-1][3]:
+            merged.append(token)
+    return merged
+
+
+def _title_state(construct: str, state: int, segment: str) -> Optional[int]:
+    """
+    Follows the title of an open link or the name of an open template through
+    segment, a stretch of it without nested constructs. Returns the new state,
+    -1 once a "|" ends the title, or None if mwparserfromhell would not accept
+    the title: a link title may not hold a line break, and a template name may
+    only be followed by whitespace once a line break follows it.
+    """
+    bar = segment.find("|")
+    title = segment if bar < 0 else segment[:bar]
+    if construct == "[[":
+        if _LINK_TITLE_BAD_RE.search(title):
+            return None
+    else:
+        if _TEMPLATE_NAME_BAD_RE.search(title):
+            return None
+        for line_number, line in enumerate(title.split("\n")):
+            if line_number and state == _NAME_TEXT:
+                state = _NAME_LINE_END
+            if line.strip():
+                if state == _NAME_LINE_END:
+                    return None
+                state = _NAME_TEXT
+    return state if bar < 0 else -1
+
+
+def opaque_spans(text: str) -> Tuple[List[int], List[int]]:
+    """
+    Returns the sorted starts and ends of the top-level comments, templates,
+    links, tables and tags in text, the regions in which mwparserfromhell does
+    not look for headings.
+
+    Follows its tokenizer: a closer only closes the innermost open construct
+    (other closers inside it are text), and a construct still open at the end of
+    the text, or a link or template whose title it does not accept, is not one
+    at all, so its opener is read as text and the scan resumes right after it.
+    """
+    tokens = _nesting_tokens(text)
+    starts, ends = [], []
+    # [construct, token index, start of the title still to check or -1, title state], innermost last
+    stack = []
+    # Indexes of openers found to be unclosed or invalid
+    failed = set()
+    i = 0
+    while True:
+        if i == len(tokens):
+            if not stack:
+                return starts, ends
+            opener = stack.pop()[1]
+            failed.add(opener)
+            i = opener + 1
+            continue
+        construct, opens, start, end = tokens[i]
+        if stack and stack[-1][2] >= 0:
+            top = stack[-1]
+            # Comments and nested templates may sit in a title, other markup may not
+            comment = construct is None and text.startswith("<!--", start)
+            nested = comment or (opens and construct == "{{") or (not opens and construct == top[0])
+            state = _title_state(top[0], top[3], text[top[2]:start if nested else end])
+            if state is None or (state >= 0 and not nested):
+                stack.pop()
+                failed.add(top[1])
+                i = top[1] + 1
+                continue
+            if state < 0:
+                top[2] = -1
+            elif comment:
+                top[2] = end
+            top[3] = state
+        if construct is None:
+            if not stack:
+                starts.append(start)
+                ends.append(end)
+        elif opens:
+            if i not in failed:
+                stack.append([construct, i, end if construct in _OPENERS else -1, _NAME_EMPTY])
+        elif stack and stack[-1][0] == construct:
+            opener = stack.pop()[1]
+            if not stack:
+                starts.append(tokens[opener][2])
+                ends.append(end)
+            elif stack[-1][2] >= 0:
+                # Carry on checking the enclosing title after the nested template
+                stack[-1][2] = end
+        elif stack and construct[0] == "<" and stack[-1][0][0] == "<":
+            # A closing tag of another name directly inside a tag makes it text
+            opener = stack.pop()[1]
+            failed.add(opener)
+            i = opener + 1
+            continue
+        i += 1
+
+
+# Tags whose content is not prose: citations plus mwparserfromhell's invisible tags
+_HIDDEN_TAGS = ("ref", "references", "categorytree", "gallery", "graph", "imagemap", "inputbox",
+                "math", "score", "section", "templatedata", "timeline")
+_HIDDEN_TAG_RE = re.compile(
+    rf"<({'|'.join(_HIDDEN_TAGS)})\b[^>]*?/>|<({'|'.join(_HIDDEN_TAGS)})\b[^>]*>.*?(?:</\2\s*>|\Z)",
+    re.DOTALL | re.IGNORECASE,
+)
+_COMMENT_RE = re.compile(r"<!--.*?(?:-->|\Z)", re.DOTALL)
+_CATEGORY_RE = re.compile(r"\[\[\s*category\s*:[^\[\]]*\]\]", re.IGNORECASE)
+# Innermost templates, links and tables first, so nesting is handled by repeating
+_TEMPLATE_RE = re.compile(r"\{\{(?:(?!\{\{|\}\}).)*\}\}", re.DOTALL)
+_WIKILINK_RE = re.compile(r"\[\[([^\[\]|]*)(?:\|([^\[\]]*))?\]\]")
+_EXTERNAL_LINK_RE = re.compile(r"\[(?:[a-z][a-z+.-]*:)?//[^\s\]]*(?:\s+([^\]]*))?\]", re.IGNORECASE)
+_TABLE_SYNTAX_RE = re.compile(r"^[ \t]*(?:\{\||\|\}|\|-|\|\+).*$|^[ \t]*[|!]|\|\||!!", re.MULTILINE)
+_TAG_RE = re.compile(r"</?[a-z][^>]*>", re.IGNORECASE)
+_QUOTES_RE = re.compile(r"'{2,}")
+_HEADING_LINE_RE = re.compile(r"^=+(.*?)=+[ \t]*$", re.MULTILINE)
+_LIST_MARKER_RE = re.compile(r"^[*#:;]+", re.MULTILINE)
+
+
+def _collapse_whitespace(text: str) -> str:
+    """One space between words, no blank lines."""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _sub_until_stable(pattern: re.Pattern, repl, text: str) -> str:
+    while True:
+        text, count = pattern.subn(repl, text)
+        if not count:
+            return text
+
+
+def strip_markup(text: str) -> str:
+    """
+    Fast regex counterpart of strip_wikicode(): drops templates, citations,
+    comments and category links, replaces links with their label and removes
+    formatting, leaving the prose.
+    """
+    if "<" in text:
+        text = _COMMENT_RE.sub("", text)
+        text = _HIDDEN_TAG_RE.sub("", text)
+    if "{{" in text:
+        text = _sub_until_stable(_TEMPLATE_RE, "", text)
+    if "[" in text:
+        text = _CATEGORY_RE.sub("", text)
+        # A link shows its label (everything after the first "|"), else its target
+        text = _sub_until_stable(_WIKILINK_RE, lambda m: m.group(2) if m.group(2) is not None else m.group(1), text)
+        text = _EXTERNAL_LINK_RE.sub(lambda m: m.group(1) or "", text)
+    if "|" in text or "!" in text:
+        text = _TABLE_SYNTAX_RE.sub(" ", text)
+    if "<" in text:
+        text = _TAG_RE.sub("", text)
+    text = _QUOTES_RE.sub("", text)
+    text = _HEADING_LINE_RE.sub(r"\1", text)
+    text = _LIST_MARKER_RE.sub("", text)
+    if "&" in text:
+        text = html.unescape(text)
+    return _collapse_whitespace(text)
+
+
+_TEMPLATE_EDGE_RE = re.compile(r"\{\{|\}\}")
+
+
+def hidden_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Sorted, non-overlapping (start, end) spans of the markup strip_markup() drops
+    whole: comments, citations and other hidden tags, templates and category
+    links. Found on a whole block, so that a sub-chunk cut out of the middle of
+    an infobox or a <ref> can still be stripped with with_spans_removed().
+    """
+    spans = []
+    if "<" in text:
+        spans.extend(m.span() for m in _COMMENT_RE.finditer(text))
+        spans.extend(m.span() for m in _HIDDEN_TAG_RE.finditer(text))
+    if "{{" in text:
+        # Every closed template, nested ones included; unclosed "{{" stay text as in strip_markup()
+        opened = []
+        for match in _TEMPLATE_EDGE_RE.finditer(text):
+            if match.group() == "{{":
+                opened.append(match.start())
+            elif opened:
+                spans.append((opened.pop(), match.end()))
+    if "[[" in text:
+        spans.extend(m.span() for m in _CATEGORY_RE.finditer(text))
+
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def with_spans_removed(text: str, start: int, end: int, spans: List[Tuple[int, int]]) -> str:
+    """text[start:end] without the parts covered by spans (as returned by hidden_spans(text))."""
+    pieces = []
+    position = start
+    # Spans are disjoint and sorted, so only the last one starting at or before start can cover it
+    first = max(bisect.bisect_right(spans, (start, end)) - 1, 0)
+    for span_start, span_end in spans[first:]:
+        if span_start >= end:
+            break
+        if span_end <= position:
+            continue
+        pieces.append(text[position:max(span_start, position)])
+        position = span_end
+    if position < end:
+        pieces.append(text[position:end])
+    return "".join(pieces)
+
+
+def strip_wikicode(text: str) -> str:
+    """Prose of a chunk via mwparserfromhell's strip_code(), without citations and category links."""
+    wikicode = mwparserfromhell.parse(text)
+    for node in wikicode.filter(recursive=False, forcetype=(mwparserfromhell.nodes.Tag, mwparserfromhell.nodes.Wikilink)):
+        if isinstance(node, mwparserfromhell.nodes.Tag):
+            hidden = str(node.tag).strip().lower() in _HIDDEN_TAGS
+        else:
+            hidden = str(node.title).strip().lower().startswith("category:")
+        if hidden:
+            wikicode.remove(node)
+    return _collapse_whitespace(wikicode.strip_code())
+
+
+class _Heading(NamedTuple):
+    level: int
+    title: str
+    text: str
+
+
 class PageParserInner:
-    def __init__(self, page: Page):
+    def __init__(self, page: Page, engine: str = "mwparserfromhell"):
         """
         Initialize the PageParserInner with a Page object.
         Extracts blocks (headings and paragraphs) from the page.
 
         Args:
             page (Page): The page to be parsed into blocks.
+            engine (str): "mwparserfromhell" (default) builds the full wikicode tree.
+                "regex" finds heading lines with a single compiled multiline scan and
+                slices the raw string, which is much faster. It skips headings inside
+                templates, links, tables, tags and comments like mwparserfromhell does,
+                and reads links and templates with invalid titles, unbalanced tags and
+                unclosed constructs as text like it does, but can still differ on
+                malformed markup: unclosed <nowiki>/<pre>, "{{{" / "}}}" runs, and
+                markup spanning lines inside a heading line.
         """
+        if engine not in PARSER_ENGINES:
+            raise ValueError(f"Unknown parser engine '{engine}', expected one of {PARSER_ENGINES}")
         self.page = page
+        self.engine = engine
+
+    def _wikicode_nodes(self) -> Iterator[Union[_Heading, str]]:
+        wikicode = mwparserfromhell.parse(self.page.raw_content)
+        for node in wikicode.nodes:
+            if isinstance(node, mwparserfromhell.nodes.Heading):
+                yield _Heading(node.level, str(node.title), str(node))
+            else:
+                yield str(node)
+
+    def _regex_nodes(self) -> Iterator[Union[_Heading, str]]:
+        text = self.page.raw_content
+
+        opaque_starts, opaque_ends = opaque_spans(text)
+
+        position = 0
+        for match in HEADING_RE.finditer(text):
+            left, title, right = match.groups()
+            # A line made only of "=" is plain text
+            if not title.strip("="):
+                continue
+            # Skip headings inside comments, templates, tables, links and tags
+            i = bisect.bisect_right(opaque_starts, match.start()) - 1
+            if i >= 0 and match.start() < opaque_ends[i]:
+                continue
+
+            level = min(len(left), len(right), 6)
+            if match.start() > position:
+                yield text[position:match.start()]
+            yield _Heading(level, "=" * (len(left) - level) + title + "=" * (len(right) - level), match.group(0))
+            position = match.end()
+
+        if position < len(text):
+            yield text[position:]
 
     @tracer.start_as_current_span("PageParserInner.__iter__")
     def __iter__(self) -> Iterator[Chunk]:
@@ -25,7 +409,10 @@ class PageParserInner:
         Yields:
             Chunk: A chunk representing either a heading or a block of text.
         """
-        wikicode = mwparserfromhell.parse(self.page.raw_content)
+        if self.engine == "regex":
+            nodes = self._regex_nodes()
+        else:
+            nodes = self._wikicode_nodes()
 
         current_block: List[str] = []
         chunk_index = 0
@@ -35,16 +422,18 @@ class PageParserInner:
         # By default, the hierarchy starts with the page title (representing level 1).
         hierarchy_stack = [self.page.title]
 
-        for node in wikicode.nodes:
+        for node in nodes:
             # MediaWiki heading
-            if isinstance(node, mwparserfromhell.nodes.Heading):
+            if isinstance(node, _Heading):
                 # Flush pending paragraph
                 if current_block:
+                    content = "".join(current_block).strip()
                     yield Chunk(
-                        content="".join(current_block).strip(),
+                        content=content,
                         index=chunk_index,
                         type=NodeType.PARAGRAPH,
-                        hierarchy_owner=hierarchy_stack[-1]
+                        hierarchy_owner=hierarchy_stack[-1],
+                        link_spans=find_link_spans(content)
                     )
                     chunk_index += 1
                     current_block = []
@@ -60,11 +449,13 @@ class PageParserInner:
                     hierarchy_stack.pop()
                 
                 # The hierarchy owner for the HEADING chunk itself is its parent (the current last element)
+                content = node.text.strip()
                 yield Chunk(
-                    content=str(node).strip(),
+                    content=content,
                     index=chunk_index,
                     type=NodeType.HEADING,
-                    hierarchy_owner=hierarchy_stack[-1]
+                    hierarchy_owner=hierarchy_stack[-1],
+                    link_spans=find_link_spans(content)
                 )
                 chunk_index += 1
 
@@ -73,36 +464,42 @@ class PageParserInner:
 
             else:
                 # Accumulate text-like nodes
-                text = str(node)
-                if text.strip() or current_block:
-                    current_block.append(text)
+                if node.strip() or current_block:
+                    current_block.append(node)
 
         # Flush remaining paragraph
         if current_block:
+            content = "".join(current_block).strip()
             yield Chunk(
-                content="".join(current_block).strip(),
+                content=content,
                 index=chunk_index,
                 type=NodeType.PARAGRAPH,
-                hierarchy_owner=hierarchy_stack[-1]
+                hierarchy_owner=hierarchy_stack[-1],
+                link_spans=find_link_spans(content)
             )
 
 class PageParser:
-    def __init__(self, page: Page):
+    def __init__(self, page: Page, text_splitter: Optional["RecursiveCharacterTextSplitter"] = None,
+                 engine: str = "mwparserfromhell"):
         """
         Initialize the PageParser with a Page object.
         Uses PageParserInner to get blocks and then LangChain to split them into smaller chunks.
 
         Args:
             page (Page): The page to be parsed into blocks for vector embedding.
+            text_splitter (RecursiveCharacterTextSplitter): Shared splitter to use.
+                Defaults to the process-wide splitter for DEFAULT_CHUNKING.
+            engine (str): Block extraction engine, see PageParserInner.
+
+        Chunk.plain_text comes from strip_markup() with either engine, so that
+        embedding texts (and their cache keys) do not depend on the engine.
+        Templates, citations and comments are located on the whole block before
+        it is split, so a sub-chunk that starts or ends inside one gets none of
+        its markup.
         """
         self.page = page
-        self.inner = PageParserInner(page)
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=100,
-            length_function=len,
-            is_separator_regex=False,
-        )
+        self.inner = PageParserInner(page, engine=engine)
+        self.text_splitter = text_splitter or get_text_splitter()
 
     @tracer.start_as_current_span("PageParser.__iter__")
     def __iter__(self) -> Iterator[Chunk]:
@@ -124,18 +521,128 @@ class PageParser:
                     index=chunk_index,
                     type=NodeType.HEADING,
                     hierarchy_owner=block.hierarchy_owner,
-                    metadata=block.metadata
+                    metadata=block.metadata,
+                    link_spans=block.link_spans,
+                    plain_text=strip_markup(block.content)
                 )
                 chunk_index += 1
             else:
                 # Split paragraphs using LangChain
                 sub_chunks = self.text_splitter.split_text(block.content)
-                for sub_content in sub_chunks:
+                hidden = hidden_spans(block.content)
+                for sub_content, start, link_spans in self._assign_links(block, sub_chunks):
+                    if start is None:
+                        plain_text = strip_markup(sub_content)
+                    else:
+                        plain_text = strip_markup(with_spans_removed(block.content, start, start + len(sub_content), hidden))
                     yield Chunk(
                         content=sub_content,
                         index=chunk_index,
                         type=NodeType.PARAGRAPH,
                         hierarchy_owner=block.hierarchy_owner,
-                        metadata=block.metadata
+                        metadata=block.metadata,
+                        link_spans=link_spans,
+                        plain_text=plain_text
                     )
                     chunk_index += 1
+
+    def _assign_links(self, block: Chunk, sub_chunks: List[str]) -> Iterator[Tuple[str, Optional[int], List[Tuple[int, str]]]]:
+        """
+        Yields each sub-chunk with its offset in the block (None if it cannot be
+        found) and the links of its block that start inside it, found by
+        bisecting the block's link offsets. Links in the overlap go to both
+        neighbouring sub-chunks, and a link cut by a split stays with the sub-chunk
+        it starts in.
+        """
+        spans = block.link_spans or []
+        offsets = [offset for offset, _ in spans]
+
+        search_from = 0
+        for sub_content in sub_chunks:
+            # Sub-chunks are ordered substrings of the block, each starting after the previous one
+            start = block.content.find(sub_content, search_from)
+            if start < 0:
+                yield sub_content, None, find_link_spans(sub_content)
+                continue
+            search_from = start + 1
+
+            lo = bisect.bisect_left(offsets, start)
+            hi = bisect.bisect_left(offsets, start + len(sub_content))
+            yield sub_content, start, [(offset - start, target) for offset, target in spans[lo:hi]]
+
+
+def _parse_page(page: Page, chunking: ChunkingConfig, engine: str) -> List[Chunk]:
+    """Process pool worker: runs the full PageParser over a single page."""
+    return list(PageParser(page, get_text_splitter(chunking), engine=engine))
+
+
+class ParallelPageParser:
+    def __init__(self, pages: Iterable[Page], workers: Optional[int] = None,
+                 max_inflight: Optional[int] = None, chunking: ChunkingConfig = DEFAULT_CHUNKING,
+                 engine: str = "mwparserfromhell"):
+        """
+        Runs PageParser over a stream of pages in a process pool, so that
+        mwparserfromhell and the text splitter do not serialize the pipeline.
+
+        Args:
+            pages (Iterable[Page]): The pages to parse, e.g. an XMLMultiPageDoc.
+            workers (int): Number of worker processes. Defaults to the CPU count.
+                With 1 worker, pages are parsed inline without a pool.
+            max_inflight (int): Maximum number of pages submitted but not yet
+                yielded. Bounds memory use. Defaults to 4 * workers.
+            chunking (ChunkingConfig): Chunk size, overlap and separators. Each
+                worker builds its splitter once and reuses it for every page.
+            engine (str): Block extraction engine, see PageParserInner.
+        """
+        self.pages = pages
+        self.workers = workers or os.cpu_count() or 1
+        self.max_inflight = max_inflight or 4 * self.workers
+        self.chunking = chunking
+        self.engine = engine
+
+    @tracer.start_as_current_span("ParallelPageParser.__iter__")
+    def __iter__(self) -> Iterator[Tuple[Page, List[Chunk]]]:
+        """
+        Iterator that yields each page with its chunks, in input order.
+
+        Yields:
+            Tuple[Page, List[Chunk]]: The page and the chunks PageParser produced for it.
+        """
+        if self.workers <= 1:
+            for page in self.pages:
+                yield page, self._collect(page, _parse_page, page, self.chunking, self.engine)
+            return
+
+        # Spawned, not forked: the pool is started from a pipeline stage thread
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            window = deque()
+            for page in self.pages:
+                window.append((page, pool.submit(_parse_page, page, self.chunking, self.engine)))
+                if len(window) >= self.max_inflight:
+                    done_page, future = window.popleft()
+                    yield done_page, self._collect(done_page, future.result)
+
+            while window:
+                done_page, future = window.popleft()
+                yield done_page, self._collect(done_page, future.result)
+
+    @staticmethod
+    def _collect(page: Page, fn, *args) -> List[Chunk]:
+        # A page that fails to parse must not take down the rest of the stream, but a
+        # dead worker fails every pending page and the pool cannot take new ones
+        try:
+            return fn(*args)
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            logging.error(f"Error parsing page '{page.title}': {e}", exc_info=True)
+            return []
+
+
+def parse_pages(pages: Iterable[Page], workers: Optional[int] = None,
+                max_inflight: Optional[int] = None,
+                chunking: ChunkingConfig = DEFAULT_CHUNKING,
+                engine: str = "mwparserfromhell") -> Iterator[Tuple[Page, List[Chunk]]]:
+    """Parse pages in a process pool, yielding (page, chunks) in input order. See ParallelPageParser."""
+    return iter(ParallelPageParser(pages, workers=workers, max_inflight=max_inflight,
+                                   chunking=chunking, engine=engine))
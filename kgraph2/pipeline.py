@@ -0,0 +1,348 @@
+import hashlib
+import logging
+import re
+import queue
+import threading
+from functools import partial
+from itertools import chain
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from opentelemetry import trace
+from .models import Page, Chunk, Node, Link, NodeType, Checkpoint, Redirect
+from .page_parser import parse_pages
+from .checkpoint import CheckpointStore
+from .client import KGraphClient
+from .config import DEFAULT_CONFIG, ChunkingConfig, DEFAULT_CHUNKING, ChunkFilterConfig, DEFAULT_CHUNK_FILTER
+from .chunk_filter import ChunkFilter
+from .quantization import EMBEDDING_DTYPES, embedding_properties
+from .tracing import get_tracer
+
+tracer = get_tracer(__name__)
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+# Link prefixes that point at something other than an article: namespaces
+# (and their aliases) and interwiki/sister-project prefixes
+_NON_ARTICLE_PREFIXES = frozenset(p.lower() for p in (
+    "Talk", "User", "User talk", "Wikipedia", "Wikipedia talk", "WP", "Project", "File", "File talk",
+    "Image", "Media", "MediaWiki", "Template", "Template talk", "Help", "Help talk", "Category",
+    "Category talk", "Portal", "Portal talk", "Draft", "Draft talk", "TimedText", "Module", "Module talk",
+    "Special", "Wiktionary", "wikt", "Wikisource", "s", "Wikiquote", "q", "Wikibooks", "b", "Wikinews", "n",
+    "Wikiversity", "v", "Wikivoyage", "voy", "Wikispecies", "species", "Wikidata", "d", "Commons", "c",
+    "meta", "m", "mw", "w", "wmf", "phab", "Foundation",
+))
+# Language interwiki links: "fr:", "zh-yue:", "simple:"
+_LANGUAGE_PREFIX_RE = re.compile(r"^(?:[a-z]{2,3}(?:-[a-z]+)*|simple)$")
+
+
+def get_uid(content: str) -> str:
+    """Generate a stable UID based on content."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def get_heading_uid(page_title: str, heading_title: str) -> str:
+    """Generate a stable UID for a heading within a page."""
+    return f"{page_title}#{heading_title}"
+
+def normalize_link_target(target: str) -> Optional[str]:
+    """
+    Turns a [[link]] target into the title of the article it points at, the way
+    MediaWiki resolves it: drops the #fragment, treats underscores as spaces and
+    uppercases the first letter. Returns None for links that do not point at an
+    article (Category:, File:, interwiki and language links, same-page #anchors).
+    """
+    title = " ".join(target.split("#", 1)[0].replace("_", " ").split())
+    if title.startswith(":"):
+        # [[:Category:X]] is a visible link to the category itself
+        title = title[1:].lstrip()
+    prefix, colon, _ = title.partition(":")
+    if colon and (prefix.strip().lower() in _NON_ARTICLE_PREFIXES or _LANGUAGE_PREFIX_RE.match(prefix.strip())):
+        return None
+    if not title:
+        return None
+    return title[0].upper() + title[1:]
+
+
+@dataclass
+class PageGraph:
+    """Nodes and links produced from one page. Nodes in embed_nodes still need their embedding."""
+    page: Page
+    nodes: List[Node] = field(default_factory=list)
+    links: List[Link] = field(default_factory=list)
+    embed_nodes: List[Node] = field(default_factory=list)
+    embed_texts: List[str] = field(default_factory=list)
+
+
+def build_page_graph(page: Page, chunks: List[Chunk], chunk_filter: Optional[ChunkFilter] = None) -> PageGraph:
+    """
+    Turn a parsed page into its Title node, chunk nodes, hierarchy links and mention links.
+    Chunks rejected by chunk_filter are written as nodes but not embedded.
+    """
+    graph = PageGraph(page=page)
+
+    # 1. Create Title node
+    title_uid = page.title
+    graph.nodes.append(Node(
+        uid=title_uid,
+        type=NodeType.TITLE,
+        properties={"title": page.title}
+    ))
+
+    # 2. Iterate over chunks
+    for chunk in chunks:
+        if chunk.type == NodeType.HEADING:
+            # Heading UID based on page title and heading title
+            # Note: chunk.content is the full heading text like "== History =="
+            # chunk.hierarchy_owner is the parent heading or page title
+            heading_text = chunk.content.strip("=").strip()
+            chunk_uid = get_heading_uid(page.title, heading_text)
+        else:
+            # Paragraph UID based on hash
+            chunk_uid = get_uid(f"{page.title}:{chunk.index}:{chunk.content[:50]}")
+
+        chunk_node = Node(
+            uid=chunk_uid,
+            type=chunk.type,
+            properties={
+                "content": chunk.content,
+                "index": chunk.index,
+            }
+        )
+        graph.nodes.append(chunk_node)
+
+        # We embed both paragraphs and headings for semantic search, as prose without markup
+        if chunk_filter is None or chunk_filter.accept(chunk):
+            graph.embed_nodes.append(chunk_node)
+            graph.embed_texts.append(chunk.plain_text if chunk.plain_text is not None else chunk.content)
+
+        # 3. Create Edges
+
+        # Edge from hierarchy owner
+        if chunk.hierarchy_owner == page.title:
+            owner_uid = page.title
+        else:
+            # Parent is a heading
+            owner_uid = get_heading_uid(page.title, chunk.hierarchy_owner)
+        graph.links.append(Link(source_uid=owner_uid, target_uid=chunk_uid))
+
+        # Link from this chunk to every mentioned article; those not ingested yet get a stub
+        targets = (normalize_link_target(target) for target in chunk.get_links())
+        for target_title in dict.fromkeys(t for t in targets if t is not None):
+            graph.links.append(Link(source_uid=chunk_uid, target_uid=target_title, stub_target=True))
+
+    return graph
+
+
+def write_redirects(kg_client: KGraphClient, redirects: List[Redirect]) -> None:
+    """Write redirect aliases as Title nodes linked to their target."""
+    kg_client.write_many(
+        nodes=[Node(uid=r.title, type=NodeType.TITLE, properties={"title": r.title, "redirect_to": r.target})
+               for r in redirects],
+        links=[Link(source_uid=r.title, target_uid=target, stub_target=True)
+               for r in redirects if (target := normalize_link_target(r.target)) is not None],
+    )
+
+
+class Pipeline:
+    def __init__(self, kg_client: KGraphClient, embed_client,
+                 checkpoint_store: Optional[CheckpointStore] = None,
+                 embed_batch_size: int = DEFAULT_CONFIG.embed_batch_size,
+                 queue_size: int = DEFAULT_CONFIG.pipeline_queue_size,
+                 parser_workers: int = DEFAULT_CONFIG.parser_workers,
+                 parser_engine: str = DEFAULT_CONFIG.parser_engine,
+                 chunking: ChunkingConfig = DEFAULT_CHUNKING,
+                 embedding_dtype: str = DEFAULT_CONFIG.embedding_dtype,
+                 chunk_filter: ChunkFilterConfig = DEFAULT_CHUNK_FILTER,
+                 report_interval: float = 10.0):
+        """
+        Ingestion pipeline: reader -> parser -> embedder -> writer.
+
+        Each stage runs on its own thread (the parser fans out to a process pool)
+        and stages are connected by bounded queues, so a slow stage applies
+        backpressure to everything upstream instead of stalling the whole loop.
+        Queue depths are logged and traced every report_interval seconds; the
+        stage in front of the fullest queue is the bottleneck.
+
+        Args:
+            kg_client (KGraphClient): Neo4j writer.
+            embed_client (EmbeddingClient): Embedding model client.
+            checkpoint_store (CheckpointStore): If set, the last page of every
+                batch is saved once its writes have committed.
+            embed_batch_size (int): Number of texts buffered before an embedding
+                call. Batches always hold whole pages.
+            queue_size (int): Capacity of the page and page-graph queues.
+            parser_workers (int): Processes used for chunking.
+            parser_engine (str): Block extraction engine, see PageParserInner.
+            chunking (ChunkingConfig): Chunk size, overlap and separators.
+            embedding_dtype (str): Storage format of the embedding property, see
+                kgraph2.quantization.
+            chunk_filter (ChunkFilterConfig): Which paragraphs are too trivial to
+                embed. They are still written as nodes.
+            report_interval (float): Seconds between queue depth reports.
+        """
+        self.kg_client = kg_client
+        self.embed_client = embed_client
+        self.checkpoint_store = checkpoint_store
+        self.embed_batch_size = embed_batch_size
+        self.parser_workers = parser_workers
+        self.parser_engine = parser_engine
+        self.chunking = chunking
+        if embedding_dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unknown embedding dtype '{embedding_dtype}', expected one of {EMBEDDING_DTYPES}")
+        self.embedding_dtype = embedding_dtype
+        self.chunk_filter = ChunkFilter(chunk_filter)
+        self.report_interval = report_interval
+
+        self.queues: Dict[str, queue.Queue] = {
+            "pages": queue.Queue(maxsize=queue_size),
+            "graphs": queue.Queue(maxsize=queue_size),
+            # Each item is a full embedding batch, so only a couple are buffered
+            "batches": queue.Queue(maxsize=2),
+        }
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Current number of items waiting in front of each stage."""
+        return {name: q.qsize() for name, q in self.queues.items()}
+
+    def run(self, doc: Iterable[Page]):
+        """Run the pipeline over a dump reader until it is exhausted. Re-raises the first stage failure."""
+        stages = [
+            threading.Thread(target=self._run_stage, args=("reader", self._read, doc), name="pipeline-reader"),
+            threading.Thread(target=self._run_stage, args=("parser", self._parse), name="pipeline-parser"),
+            threading.Thread(target=self._run_stage, args=("embedder", self._embed), name="pipeline-embedder"),
+            threading.Thread(target=self._run_stage, args=("writer", self._write), name="pipeline-writer"),
+        ]
+        for stage in stages:
+            stage.start()
+
+        # The writer is the last stage to finish, even when an upstream stage fails
+        writer = stages[-1]
+        while writer.is_alive():
+            writer.join(timeout=self.report_interval)
+            if writer.is_alive() and not self._stop.is_set():
+                self._report_queue_depths()
+        for stage in stages:
+            stage.join()
+
+        skipped = self.chunk_filter.skipped
+        logging.info(f"Chunk filter saved {sum(skipped.values())} embeddings: "
+                     + ", ".join(f"{reason}={count}" for reason, count in sorted(skipped.items())))
+        if self._errors:
+            raise self._errors[0]
+
+    def _report_queue_depths(self):
+        depths = self.queue_depths()
+        with tracer.start_as_current_span("pipeline_queue_depths") as span:
+            for name, depth in depths.items():
+                span.set_attribute(f"pipeline.queue.{name}", depth)
+        logging.info("Pipeline queue depths: " + ", ".join(f"{name}={depth}" for name, depth in depths.items()))
+
+    def _run_stage(self, name: str, fn, *args):
+        try:
+            fn(*args)
+        except BaseException as e:
+            logging.error(f"Pipeline stage '{name}' failed: {e}", exc_info=True)
+            self._errors.append(e)
+            self._stop.set()
+
+    def _put(self, name: str, item: Any):
+        # Blocks while the queue is full (backpressure), but gives up once the pipeline is stopping
+        while not self._stop.is_set():
+            try:
+                self.queues[name].put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _drain(self, name: str) -> Iterator[Any]:
+        while not self._stop.is_set():
+            try:
+                item = self.queues[name].get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def _read(self, doc: Iterable[Page]):
+        redirects = getattr(doc, "redirects", None)
+        for page in doc:
+            if self._stop.is_set():
+                return
+            # Redirect aliases are cheap, so the reader writes them directly
+            if redirects:
+                batch = redirects[:]
+                del redirects[:len(batch)]
+                write_redirects(self.kg_client, batch)
+            self._put("pages", page)
+
+        if redirects:
+            write_redirects(self.kg_client, redirects[:])
+            redirects.clear()
+        self._put("pages", _DONE)
+
+    def _parse(self):
+        parsed = parse_pages(self._drain("pages"), workers=self.parser_workers,
+                             chunking=self.chunking, engine=self.parser_engine)
+        for page, chunks in parsed:
+            # Root span per page
+            with tracer.start_as_current_span("process_page") as page_span:
+                page_span.set_attribute("wiki.page_title", page.title)
+                logging.info(f"Processing page: {page.title}")
+                try:
+                    graph = build_page_graph(page, chunks, self.chunk_filter)
+                    page_span.set_attribute("wiki.skipped_embeddings", len(graph.nodes) - 1 - len(graph.embed_nodes))
+                except Exception as e:
+                    logging.error(f"Error processing page '{page.title}': {e}", exc_info=True)
+                    page_span.record_exception(e)
+                    page_span.set_status(trace.Status(trace.StatusCode.ERROR))
+                    # Keep the page (without content) so checkpoints still advance past it
+                    graph = PageGraph(page=page)
+            self._put("graphs", graph)
+        self._put("graphs", _DONE)
+
+    def _embed(self):
+        buffer: List[PageGraph] = []
+        buffered_texts = 0
+        for graph in self._drain("graphs"):
+            buffer.append(graph)
+            buffered_texts += len(graph.embed_texts)
+            # Batches hold whole pages, so a batch is also a safe checkpoint boundary
+            if buffered_texts >= self.embed_batch_size:
+                self._put("batches", self._embed_batch(buffer))
+                buffer, buffered_texts = [], 0
+
+        if buffer and not self._stop.is_set():
+            self._put("batches", self._embed_batch(buffer))
+        self._put("batches", _DONE)
+
+    def _embed_batch(self, graphs: List[PageGraph]) -> List[PageGraph]:
+        nodes = [node for graph in graphs for node in graph.embed_nodes]
+        contents = [text for graph in graphs for text in graph.embed_texts]
+        with tracer.start_as_current_span("batch_embedding_flush") as flush_span:
+            flush_span.set_attribute("batch_size", len(contents))
+            if contents:
+                embeddings = self.embed_client.get_embeddings(contents)
+                flush_span.set_attribute("dedup_ratio", self.embed_client.last_dedup_ratio)
+                logging.info(f"Embedded {len(contents)} chunks from {len(graphs)} pages "
+                             f"(dedup ratio {self.embed_client.last_dedup_ratio:.1%})")
+                # Quantized before write; float32 nodes keep a row view into the batch array
+                for node, props in zip(nodes, embedding_properties(embeddings, self.embedding_dtype)):
+                    node.properties.update(props)
+        return graphs
+
+    def _write(self):
+        for graphs in self._drain("batches"):
+            with tracer.start_as_current_span("batch_write") as span:
+                span.set_attribute("batch_pages", len(graphs))
+                # Nodes are written ONLY AFTER their embedding is attached.
+                # The whole batch is buffered with a single lock acquisition.
+                self.kg_client.write_many(nodes=chain.from_iterable(graph.nodes for graph in graphs),
+                                          links=chain.from_iterable(graph.links for graph in graphs))
+
+                if self.checkpoint_store is not None and graphs:
+                    # Every page in this batch is now buffered in kg_client
+                    checkpoint = Checkpoint.from_page(graphs[-1].page)
+                    self.kg_client.commit_barrier(partial(self.checkpoint_store.save, checkpoint))
@@ -0,0 +1,60 @@
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+# Storage formats for the "embedding" node property:
+#   float32  list of floats (Bolt sends every float as 9 bytes), usable by Neo4j vector indexes
+#   float16  little-endian float16 bytes, 2 bytes per dimension
+#   int8     int8 bytes, 1 byte per dimension, plus a float "embedding_scale" per node;
+#            the vector is recovered as codes * scale
+# float16 and int8 are byte arrays, so they cannot back a Neo4j vector index;
+# query code reads them back with decode_embedding().
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Quantizes a (n, dim) float array. Returns the codes and, for int8, the
+    per-vector scales (None otherwise). int8 uses symmetric scaling, so each
+    vector's largest absolute component maps to 127.
+    """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unknown embedding dtype '{dtype}', expected one of {EMBEDDING_DTYPES}")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float32":
+        return vectors, None
+    if dtype == "float16":
+        return vectors.astype("<f2"), None
+
+    scales = np.abs(vectors).max(axis=1) / 127
+    # All-zero vectors keep a zero scale and all-zero codes
+    safe = np.where(scales > 0, scales, 1)
+    codes = np.clip(np.rint(vectors / safe[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize(codes: np.ndarray, dtype: str, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Inverse of quantize(): returns float32 vectors."""
+    if dtype == "int8":
+        return codes.astype(np.float32) * np.asarray(scales, dtype=np.float32)[..., None]
+    return np.asarray(codes, dtype=np.float32)
+
+
+def embedding_properties(vectors: np.ndarray, dtype: str) -> List[Dict[str, Any]]:
+    """Node properties holding each quantized vector, in the storage format described above."""
+    codes, scales = quantize(vectors, dtype)
+    if dtype == "float32":
+        # Row views; the Neo4j driver packs ndarrays itself
+        return [{"embedding": row} for row in codes]
+    if dtype == "float16":
+        return [{"embedding": row.tobytes()} for row in codes]
+    return [{"embedding": row.tobytes(), "embedding_scale": float(scale)} for row, scale in zip(codes, scales)]
+
+
+def decode_embedding(properties: Dict[str, Any], dtype: str) -> np.ndarray:
+    """Reads an embedding back from node properties written with embedding_properties()."""
+    value = properties["embedding"]
+    if dtype == "float32":
+        return np.asarray(value, dtype=np.float32)
+    if dtype == "float16":
+        return np.frombuffer(value, dtype="<f2").astype(np.float32)
+    return np.frombuffer(value, dtype=np.int8).astype(np.float32) * np.float32(properties["embedding_scale"])
@@ -1,33 +1,61 @@
+import argparse
 import logging
-import hashlib
-from kgraph2.models import XMLMultiPageDoc, NodeType, Node, Link
-from kgraph2.page_parser import PageParser
+from kgraph2.models import XMLMultiPageDoc, MultistreamDumpReader
+from kgraph2.checkpoint import CheckpointStore
+from kgraph2.config import DEFAULT_CONFIG
 from kgraph2.client import KGraphClient
 from kgraph2.embeddings import EmbeddingClient
-from kgraph2.tracing import setup_tracing, get_tracer
-from opentelemetry import trace
+from kgraph2.embedding_cache import EmbeddingCache
+from kgraph2.pipeline import Pipeline
+from kgraph2.tracing import setup_tracing
 
 # Setup basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-setup_tracing("kgraph-pipeline")
-tracer = get_tracer(__name__)
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ingest a Wikipedia XML dump into the knowledge graph.")
+    # Hardcoded XML path as requested
+    parser.add_argument("xml_path", nargs="?",
+                        default="enwiki-20250501-pages-articles-multistream11.xml-p5399367p6899366")
+    parser.add_argument("--index-path", default=None,
+                        help="Matching -index.txt.bz2 (with xml_path pointing at the .bz2 dump) "
+                             "to decompress and parse the multistream shard in parallel")
+    parser.add_argument("--checkpoint", default=DEFAULT_CONFIG.checkpoint_path,
+                        help="Checkpoint file updated after each committed batch")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip everything up to the last committed checkpoint")
+    parser.add_argument("--replay-dead-letters", action="store_true",
+                        help=f"Re-send the batches that failed in earlier runs "
+                             f"({DEFAULT_CONFIG.dead_letter_path}) and exit")
+    return parser.parse_args(argv)
 
-def get_uid(content: str) -> str:
-    """Generate a stable UID based on content."""
-    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+def main(argv=None):
+    args = parse_args(argv)
+    setup_tracing("kgraph-pipeline")
+    xml_path = args.xml_path
+    index_path = args.index_path
 
-def get_heading_uid(page_title: str, heading_title: str) -> str:
-    """Generate a stable UID for a heading within a page."""
-    return f"{page_title}#{heading_title}"
+    checkpoint_store = CheckpointStore(args.checkpoint, xml_path)
+    resume_from = checkpoint_store.load() if args.resume else None
+    if resume_from is not None:
+        logging.info(f"Resuming after page {resume_from.page_id} (stream offset {resume_from.stream_offset})")
+    elif args.resume:
+        logging.info(f"No checkpoint found at {args.checkpoint}, starting from the beginning")
 
-def main():
-    # Hardcoded XML path as requested
-    xml_path = "enwiki-20250501-pages-articles-multistream11.xml-p5399367p6899366" 
-    
     # Initialize clients
     kg_client = KGraphClient()
-    embed_client = EmbeddingClient()
+    if args.replay_dead_letters:
+        try:
+            kg_client.replay_dead_letters()
+        finally:
+            kg_client.close()
+        return
+
+    embed_cache = None
+    if DEFAULT_CONFIG.embedding_cache_path:
+        embed_cache = EmbeddingCache(DEFAULT_CONFIG.embedding_cache_path, DEFAULT_CONFIG.embedding_model,
+                                     lru_size=DEFAULT_CONFIG.embedding_cache_lru_size)
+    embed_client = EmbeddingClient(cache=embed_cache)
     
     # Ensure constraints are in place
     logging.info("Ensuring Neo4j constraints...")
@@ -35,107 +63,41 @@ def main():
     
     # Load XML doc
     try:
-        doc = XMLMultiPageDoc(xml_path)
+        # Articles only; redirects become aliases instead of being chunked and embedded
+        filters = {"namespaces": {0}, "skip_redirects": True, "resume_from": resume_from}
+        if index_path:
+            doc = MultistreamDumpReader(xml_path, index_path, engine="lxml", **filters)
+        else:
+            doc = XMLMultiPageDoc(xml_path, engine="lxml", **filters)
     except FileNotFoundError:
         logging.error(f"File not found: {xml_path}")
         return
 
-    # Global batching for embeddings
-    EMBED_BATCH_SIZE = 1024
-    embed_buffer = []          # Stores (node_object, content_string) tuples
-
-    for page in doc:
-        # Use start_as_current_span without a parent 'with' block to make this a root span
-        with tracer.start_as_current_span("process_page") as page_span:
+    # Reading, chunking, embedding and Neo4j writes run as concurrent stages
+    pipeline = Pipeline(kg_client, embed_client, checkpoint_store=checkpoint_store,
+                        embed_batch_size=DEFAULT_CONFIG.embed_batch_size,
+                        queue_size=DEFAULT_CONFIG.pipeline_queue_size,
+                        parser_workers=DEFAULT_CONFIG.parser_workers,
+                        parser_engine=DEFAULT_CONFIG.parser_engine,
+                        embedding_dtype=DEFAULT_CONFIG.embedding_dtype)
+    try:
+        try:
+            pipeline.run(doc)
+        finally:
+            # Before the Neo4j client, whose close() raises if any batch failed
             try:
-                page_span.set_attribute("wiki.page_title", page.title)
-                logging.info(f"Processing page: {page.title}")
-                
-                # 1. Create Title node
-                title_uid = page.title 
-                title_node = Node(
-                    uid=title_uid,
-                    type=NodeType.TITLE,
-                    properties={"title": page.title}
-                )
-                kg_client.write_nodes([title_node])
-                
-                # 2. Iterate over chunks
-                parser = PageParser(page)
-                for chunk in parser:
-                    if chunk.type == NodeType.HEADING:
-                        # Heading UID based on page title and heading title
-                        # Note: chunk.content is the full heading text like "== History =="
-                        # chunk.hierarchy_owner is the parent heading or page title
-                        heading_text = chunk.content.strip("=").strip()
-                        chunk_uid = get_heading_uid(page.title, heading_text)
-                    else:
-                        # Paragraph UID based on hash
-                        chunk_uid = get_uid(f"{page.title}:{chunk.index}:{chunk.content[:50]}")
-                    
-                    # Create Node
-                    chunk_node = Node(
-                        uid=chunk_uid,
-                        type=chunk.type,
-                        properties={
-                            "content": chunk.content,
-                            "index": chunk.index,
-                        }
-                    )
-                    
-                    # Buffer for embeddings if it's a paragraph or heading
-                    # Actually we embed both for semantic search
-                    embed_buffer.append((chunk_node, chunk.content))
-                    
-                    # 3. Create Edges
-                    
-                    # Edge from hierarchy owner
-                    if chunk.hierarchy_owner == page.title:
-                        owner_uid = page.title
-                    else:
-                        # Parent is a heading
-                        owner_uid = get_heading_uid(page.title, chunk.hierarchy_owner)
-                    
-                    kg_client.write_links([Link(source_uid=owner_uid, target_uid=chunk_uid)])
-                    
-                    # Extract links via get_links()
-                    mentions = chunk.get_links()
-                    for target_title in mentions:
-                        # Link from this chunk to the mentioned Page title
-                        kg_client.write_links([Link(source_uid=chunk_uid, target_uid=target_title)])
-                        
-                    # Batch embeddings once buffer is full
-                    if len(embed_buffer) >= EMBED_BATCH_SIZE:
-                        with tracer.start_as_current_span("batch_embedding_flush") as flush_span:
-                            flush_span.set_attribute("batch_size", len(embed_buffer))
-                            nodes = [item[0] for item in embed_buffer]
-                            contents = [item[1] for item in embed_buffer]
-                            
-                            embeddings = embed_client.get_embeddings(contents)
-                            for node, vec in zip(nodes, embeddings):
-                                node.properties["embedding"] = vec
-                                # Write the node to KG client ONLY AFTER embedding is attached
-                                kg_client.write_nodes([node])
-                            
-                            embed_buffer.clear()
-            except Exception as e:
-                logging.error(f"Error processing page '{page.title}': {e}", exc_info=True)
-                page_span.record_exception(e)
-                page_span.set_status(trace.Status(trace.StatusCode.ERROR))
-                continue
-
-    # Final flush for remaining embeddings
-    if embed_buffer:
-        with tracer.start_as_current_span("final_embedding_flush") as flush_span:
-            flush_span.set_attribute("batch_size", len(embed_buffer))
-            nodes = [item[0] for item in embed_buffer]
-            contents = [item[1] for item in embed_buffer]
-            embeddings = embed_client.get_embeddings(contents)
-            for node, vec in zip(nodes, embeddings):
-                node.properties["embedding"] = vec
-                kg_client.write_nodes([node])
-            embed_buffer.clear()
-
+                embed_client.close()
+            finally:
+                if embed_cache is not None:
+                    logging.info(f"Embedding cache: {embed_cache.hits} hits, {embed_cache.misses} misses")
+                    embed_cache.close()
+    except BaseException:
+        # Still wait for the submitted writes, without hiding the pipeline's error
+        try:
+            kg_client.close()
+        except Exception:
+            logging.exception("Closing the Neo4j client failed")
+        raise
     # Final flush to write any remaining buffered items in the client
     kg_client.close()
     logging.info("Finished processing.")
@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+from kgraph2.checkpoint import CheckpointStore
+from kgraph2.models import Checkpoint, Page
+
+def test_checkpoint_store_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoint.json")
+        store = CheckpointStore(path, "dump.xml.bz2")
+        assert store.load() is None
+
+        store.save(Checkpoint(page_id=5399373, stream_offset=1234))
+        assert store.load() == Checkpoint(page_id=5399373, stream_offset=1234)
+        assert not os.path.exists(f"{path}.tmp")
+
+        # A checkpoint for another dump must not be used to resume this one
+        assert CheckpointStore(path, "other.xml.bz2").load() is None
+
+def test_checkpoint_from_page():
+    page = Page(title="State of Change", raw_content="", metadata={"page_id": 5399373, "stream_offset": 42})
+    assert Checkpoint.from_page(page) == Checkpoint(page_id=5399373, stream_offset=42)
+
+    page = Page(title="State of Change", raw_content="", metadata={"page_id": 5399373})
+    assert Checkpoint.from_page(page) == Checkpoint(page_id=5399373)
@@ -0,0 +1,38 @@
+from kgraph2.chunk_filter import ChunkFilter
+from kgraph2.config import ChunkFilterConfig
+from kgraph2.models import Chunk, NodeType, Page
+from kgraph2.page_parser import PageParser
+from kgraph2.pipeline import build_page_graph
+
+def paragraph(content):
+    return Chunk(content=content, index=0, type=NodeType.PARAGRAPH, hierarchy_owner="Page")
+
+def test_reject_reasons():
+    chunk_filter = ChunkFilter(ChunkFilterConfig(min_prose_chars=20))
+
+    assert chunk_filter.reject_reason(paragraph("{{Short description|American softball player}}\n{{Use mdy dates|date=January 2019}}")) == "template_only"
+    assert chunk_filter.reject_reason(paragraph("[[Category:Living people]]\n[[Category:Softball players]]")) == "category_only"
+    assert chunk_filter.reject_reason(paragraph("| 186\n| 64\n|-\n| '''2007'''\n| [[Chicago Bandits]]")) == "template_only"
+    assert chunk_filter.reject_reason(paragraph("She won.")) == "too_short"
+    assert chunk_filter.reject_reason(paragraph("{{Infobox person\n| name = Ada\n}}\nAda was an English mathematician.")) is None
+    assert chunk_filter.reject_reason(paragraph("| birth_place = London\n| spouse = {{marriage|William King|1835}}\n}}")) == "template_only"
+    assert chunk_filter.reject_reason(paragraph(
+        "{{Nihongo|'''Tokyo'''|東京|Tōkyō}} is the capital and most populous city of Japan.")) is None
+    assert chunk_filter.reject_reason(paragraph("{{As of|2020}}, the town had a population of 5,000.")) is None
+    assert chunk_filter.reject_reason(Chunk(content="== Career ==", index=0, type=NodeType.HEADING, hierarchy_owner="Page")) is None
+
+def test_disabled_detectors():
+    chunk_filter = ChunkFilter(ChunkFilterConfig(min_prose_chars=0, skip_template_only=False, skip_category_only=False))
+    assert chunk_filter.reject_reason(paragraph("{{Short description|Foo}}")) is None
+    assert chunk_filter.reject_reason(paragraph("[[Category:Foo]]")) is None
+
+def test_rejected_chunks_are_written_but_not_embedded():
+    content = ("{{Short description|Mathematician}}\n== Life ==\n'''Ada''' was an English mathematician and writer.\n"
+               "== Notes ==\n[[Category:Mathematicians]]")
+    page = Page(title="Ada", raw_content=content)
+    chunk_filter = ChunkFilter()
+    graph = build_page_graph(page, list(PageParser(page)), chunk_filter)
+
+    assert len(graph.nodes) == 6
+    assert graph.embed_texts == ["Life", "Ada was an English mathematician and writer.", "Notes"]
+    assert chunk_filter.skipped == {"template_only": 1, "category_only": 1}
@@ -0,0 +1,337 @@
+import json
+import threading
+import time
+import numpy as np
+import pytest
+
+from kgraph2.client import KGraphClient, estimate_bytes, serialized_bytes
+from kgraph2.models import Link, Node, NodeType
+
+def make_client(execute):
+    # The driver connects lazily, so no Neo4j server is needed as long as no batch reaches it
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, max_concurrency=2, dead_letter_path="")
+    client._execute_with_semaphore = execute
+    return client
+
+def test_commit_barrier_waits_for_submitted_batches():
+    release = threading.Event()
+    fired = []
+    client = make_client(lambda *args: release.wait(5))
+
+    client.write_nodes([Node(uid=f"n{i}", type=NodeType.TITLE, properties={"title": f"n{i}"}) for i in range(3)])
+    client.commit_barrier(lambda: fired.append(1))
+    client.commit_barrier(lambda: fired.append(2))
+    assert fired == []
+
+    release.set()
+    client.close()
+    assert fired == [1, 2]
+
+def test_commit_barrier_never_fires_after_failed_batch():
+    fired = []
+
+    def execute(cypher, sub_batch, label, index_offset, size_bytes):
+        raise RuntimeError("boom")
+
+    client = make_client(execute)
+    client.write_nodes([Node(uid="n0", type=NodeType.TITLE, properties={"title": "n0"})])
+    client.commit_barrier(lambda: fired.append(1))
+    with pytest.raises(RuntimeError, match="1 Neo4j sub-batch"):
+        client.close()
+    client.commit_barrier(lambda: fired.append(2))
+
+    assert fired == []
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    def data(self):
+        return self.records
+
+class FakeDriver:
+    """
+    Stands in for the neo4j driver: session().execute_write(fn) runs fn against a recording tx.
+    Remembers the uids of written nodes and, like the link query, reports how many link rows found both ends.
+    """
+    def __init__(self):
+        self.runs = []
+        self.uids = set()
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, fn):
+        return fn(self)
+
+    def run(self, cypher, **params):
+        self.runs.append((cypher, params))
+        if "AS linked" in cypher:
+            linked = sum(1 for row in params["batch"] if row["source"] in self.uids and row["target"] in self.uids)
+            return FakeResult([{"linked": linked}])
+        self.uids.update(row["uid"] for row in params["batch"])
+        return FakeResult([])
+
+    def close(self):
+        pass
+
+def test_ndarray_embeddings_reach_the_driver_unconverted():
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, max_concurrency=2)
+    client._driver = FakeDriver()
+    embeddings = np.arange(6, dtype=np.float32).reshape(2, 3)
+
+    client.write_nodes([Node(uid=f"p{i}", type=NodeType.PARAGRAPH, properties={"content": "x", "embedding": embeddings[i]})
+                        for i in range(2)])
+    client.close()
+
+    rows = [row for _, params in client._driver.runs for row in params["batch"]]
+    assert [row["uid"] for row in rows] == ["p0", "p1"]
+    # Still views into the batch array; the driver packs ndarrays itself
+    assert all(isinstance(row["embedding"], np.ndarray) and np.shares_memory(row["embedding"], embeddings) for row in rows)
+
+def test_node_merge_sets_keys_of_every_row():
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, max_concurrency=2)
+    client._driver = FakeDriver()
+
+    # The first row has no embedding, e.g. because the chunk filter skipped it
+    client.write_nodes([Node(uid="p0", type=NodeType.PARAGRAPH, properties={"content": "x"}),
+                        Node(uid="p1", type=NodeType.PARAGRAPH, properties={"content": "y", "embedding": [0.5]})])
+    client.close()
+
+    (cypher, _), = client._driver.runs
+    assert "n.content = row.content" in cypher
+    assert "n.embedding = row.embedding" in cypher
+
+def test_writes_block_once_inflight_limit_is_reached():
+    release = threading.Event()
+    executed = []
+
+    def execute(cypher, sub_batch, label, index_offset, size_bytes):
+        release.wait(5)
+        executed.append(len(sub_batch))
+
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, max_concurrency=2, max_inflight_batches=1)
+    client._execute_with_semaphore = execute
+
+    nodes = [Node(uid=f"n{i}", type=NodeType.TITLE, properties={"title": f"n{i}"}) for i in range(4)]
+    producer = threading.Thread(target=client.write_nodes, args=(nodes,))
+    producer.start()
+    producer.join(0.2)
+    # The second sub-batch waits for the first to finish
+    assert producer.is_alive()
+    assert client._inflight_batches == 1
+
+    release.set()
+    producer.join(5)
+    client.close()
+    assert not producer.is_alive()
+    assert executed == [2, 2]
+    assert client.backpressure_seconds > 0
+
+def test_estimate_bytes():
+    rows = [{"uid": "abc", "embedding": np.zeros(4, dtype=np.float32), "index": 3, "blob": b"xy", "tags": [1, 2]}]
+    assert estimate_bytes(rows) == (3 + 3) + (9 + 16) + (5 + 8) + (4 + 2) + (4 + 16)
+
+def test_basic_metrics_never_serialize_batches(monkeypatch):
+    import kgraph2.client
+
+    def fail(*args, **kwargs):
+        raise AssertionError("json.dumps on the write path")
+    monkeypatch.setattr(kgraph2.client.json, "dumps", fail)
+
+    for level in ["basic", "off"]:
+        client = KGraphClient(uri="bolt://localhost:1", batch_size=2, max_concurrency=2, metrics_level=level)
+        client._driver = FakeDriver()
+        client.write_nodes([Node(uid="p0", type=NodeType.PARAGRAPH,
+                                 properties={"content": "x", "embedding": np.zeros(384, dtype=np.float32)})])
+        client.close()
+        assert len(client._driver.runs) == 1
+
+def test_write_many_buffers_nodes_and_links_together():
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=3, max_concurrency=2)
+    client._driver = FakeDriver()
+
+    client.write_many(nodes=(Node(uid=f"n{i}", type=NodeType.TITLE, properties={"title": f"n{i}"}) for i in range(2)),
+                      links=iter([Link(source_uid="n0", target_uid="n1")]))
+    assert len(client._node_buffer) == 2 and len(client._link_buffer) == 1
+    assert client._driver.runs == []
+
+    client.write_many(nodes=[Node(uid="n2", type=NodeType.TITLE, properties={"title": "n2"})])
+    assert client._node_buffer == []
+    client.close()
+    assert [len(params["batch"]) for _, params in client._driver.runs] == [3, 1]
+
+class FlakyDriver(FakeDriver):
+    """Fails the first `failures` writes with the given error."""
+    def __init__(self, failures, error):
+        super().__init__()
+        self.failures = failures
+        self.error = error
+
+    def execute_write(self, fn):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        return super().execute_write(fn)
+
+def test_transient_errors_are_retried():
+    from neo4j.exceptions import TransientError
+
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, write_retries=3, write_retry_backoff=0,
+                          dead_letter_path="")
+    client._driver = FlakyDriver(2, TransientError("Neo.TransientError.Transaction.DeadlockDetected"))
+    client.write_nodes([Node(uid="n0", type=NodeType.TITLE, properties={"title": "n0"})])
+    client.close()
+
+    assert len(client._driver.runs) == 1
+    assert client.failed_batches == 0
+
+def test_failed_batches_are_dead_lettered_and_replayed(tmp_path):
+    from neo4j.exceptions import ClientError
+
+    dead_letters = tmp_path / "dead_letter.jsonl"
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, write_retries=3, write_retry_backoff=0,
+                          dead_letter_path=str(dead_letters))
+    # Not retryable: fails once and goes straight to the dead-letter file
+    client._driver = FlakyDriver(1, ClientError("constraint violated"))
+    client.write_nodes([Node(uid="n0", type=NodeType.PARAGRAPH,
+                             properties={"embedding": np.array([1, 2], dtype=np.int8).tobytes(), "embedding_scale": 0.5})])
+    with pytest.raises(RuntimeError, match="dead_letter.jsonl"):
+        client.close()
+    assert client._driver.runs == []
+    assert len(dead_letters.read_text().splitlines()) == 1
+
+    replay = KGraphClient(uri="bolt://localhost:1", batch_size=2, dead_letter_path=str(dead_letters))
+    replay._driver = FakeDriver()
+    assert replay.replay_dead_letters() == 1
+    replay.close()
+
+    (cypher, params), = replay._driver.runs
+    assert cypher.strip().startswith("UNWIND $batch")
+    assert params["batch"] == [{"embedding": b"\x01\x02", "embedding_scale": 0.5, "uid": "n0"}]
+    assert not dead_letters.exists()
+    assert replay.replay_dead_letters() == 0
+
+class SlowNodeDriver(FakeDriver):
+    """Node writes take a while, so unordered link writes would overtake them."""
+    def run(self, cypher, **params):
+        if "AS linked" not in cypher:
+            time.sleep(0.05)
+        return super().run(cypher, **params)
+
+def test_links_wait_for_their_nodes():
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, max_concurrency=4, dead_letter_path="")
+    client._driver = SlowNodeDriver()
+    nodes = [Node(uid=f"n{i}", type=NodeType.PARAGRAPH, properties={"content": f"n{i}"}) for i in range(4)]
+    links = [Link(source_uid="n0", target_uid=f"n{i}") for i in range(1, 4)]
+    # Both flush right away; with free workers the link sub-batches would finish first
+    client.write_many(nodes=nodes, links=links)
+    client.close()
+
+    assert client.dropped_links == 0
+    labels = ["links" if "AS linked" in cypher else "nodes" for cypher, _ in client._driver.runs]
+    assert labels == ["nodes", "nodes", "links", "links"]
+
+def test_links_without_endpoints_are_counted_as_dropped():
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, dead_letter_path="")
+    client._driver = FakeDriver()
+    client.write_many(nodes=[Node(uid="a", type=NodeType.TITLE, properties={"title": "a"})],
+                      links=[Link(source_uid="a", target_uid="missing")])
+    client.close()
+
+    assert client.dropped_links == 1
+
+def test_links_depending_on_a_failed_node_batch_are_dead_lettered(tmp_path):
+    from neo4j.exceptions import ClientError
+
+    dead_letters = tmp_path / "dead_letter.jsonl"
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, write_retry_backoff=0,
+                          dead_letter_path=str(dead_letters))
+    client._driver = FlakyDriver(1, ClientError("constraint violated"))
+    client.write_many(nodes=[Node(uid="a", type=NodeType.TITLE, properties={"title": "a"}),
+                             Node(uid="b", type=NodeType.TITLE, properties={"title": "b"})],
+                      links=[Link(source_uid="a", target_uid="b")])
+    with pytest.raises(RuntimeError, match="2 Neo4j sub-batch"):
+        client.close()
+    assert client._driver.runs == []
+
+    replay = KGraphClient(uri="bolt://localhost:1", batch_size=2, dead_letter_path=str(dead_letters))
+    replay._driver = SlowNodeDriver()
+    assert replay.replay_dead_letters() == 2
+    replay.close()
+    assert replay.dropped_links == 0
+    assert replay._driver.uids == {"a", "b"}
+
+def test_mention_targets_are_stubbed_once_per_flush():
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=10, dead_letter_path="")
+    client._driver = FakeDriver()
+    client.write_many(
+        nodes=[Node(uid="Page", type=NodeType.TITLE, properties={"title": "Page"}),
+               Node(uid="p0", type=NodeType.PARAGRAPH, properties={"content": "[[Elsewhere]]"}),
+               Node(uid="p1", type=NodeType.PARAGRAPH, properties={"content": "[[Elsewhere]] [[Page]]"})],
+        links=[Link(source_uid="Page", target_uid="p0"),
+               Link(source_uid="Page", target_uid="p1"),
+               Link(source_uid="p0", target_uid="Elsewhere", stub_target=True),
+               Link(source_uid="p1", target_uid="Elsewhere", stub_target=True),
+               Link(source_uid="p1", target_uid="Page", stub_target=True)])
+    client.close()
+
+    stubs = [params["batch"] for cypher, params in client._driver.runs if "n.stub = true" in cypher]
+    assert stubs == [[{"uid": "Elsewhere"}, {"uid": "Page"}]]
+    assert client.dropped_links == 0
+
+def test_writing_a_page_clears_its_stub_flag():
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=10, dead_letter_path="")
+    client._driver = FakeDriver()
+    client.write_nodes([Node(uid="Page", type=NodeType.TITLE, properties={"title": "Page"})])
+    client.close()
+
+    (cypher, _), = client._driver.runs
+    on_match = cypher.split("ON MATCH SET")[1]
+    assert "n:Title" in on_match
+    assert "n.stub = null" in on_match
+
+def test_links_flushed_after_their_node_batch_failed_are_dead_lettered(tmp_path):
+    from concurrent.futures import wait
+    from neo4j.exceptions import ClientError
+
+    dead_letters = tmp_path / "dead_letter.jsonl"
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, write_retry_backoff=0,
+                          dead_letter_path=str(dead_letters))
+    client._driver = FlakyDriver(1, ClientError("constraint violated"))
+    # The node batch flushes on its own and has failed before the link is even buffered
+    client.write_nodes([Node(uid="a", type=NodeType.TITLE, properties={"title": "a"}),
+                        Node(uid="b", type=NodeType.TITLE, properties={"title": "b"})])
+    wait(client._futures)
+    client.write_links([Link(source_uid="a", target_uid="b")])
+    with pytest.raises(RuntimeError, match="2 Neo4j sub-batch"):
+        client.close()
+
+    assert client.dropped_links == 0
+    labels = [json.loads(line)["label"] for line in dead_letters.read_text().splitlines()]
+    assert labels == ["Nodes:Title", "Links"]
+
+def test_full_metrics_measure_quantized_embeddings():
+    rows = [{"uid": "p0", "embedding": np.array([1, -2, 3], dtype=np.int8).tobytes(), "embedding_scale": 0.5}]
+    assert serialized_bytes(rows) == len(json.dumps([{"uid": "p0", "embedding": "", "embedding_scale": 0.5}])) + 3
+
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, metrics_level="full", dead_letter_path="")
+    client._driver = FakeDriver()
+    client.write_nodes([Node(uid="p0", type=NodeType.PARAGRAPH, properties=rows[0])])
+    client.close()
+    assert len(client._driver.runs) == 1
+
+def test_metrics_failure_does_not_fail_the_write():
+    client = KGraphClient(uri="bolt://localhost:1", batch_size=2, metrics_level="full", dead_letter_path="")
+    client._driver = FakeDriver()
+    # Not JSON serializable, but the driver would take it
+    client.write_nodes([Node(uid="p0", type=NodeType.PARAGRAPH, properties={"when": object()})])
+    client.close()
+    assert len(client._driver.runs) == 1
+    assert client.failed_batches == 0
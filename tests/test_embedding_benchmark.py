@@ -0,0 +1,146 @@
+import time
+from functools import lru_cache
+
+import numpy as np
+import pytest
+
+from kgraph2.page_parser import PageParser
+from test_page_parser_benchmark import load_sample_pages
+
+
+@lru_cache(maxsize=None)
+def default_client():
+    """The default EmbeddingClient with its model loaded, or the error loading it. Tried once, since a failed download can take a minute."""
+    from kgraph2.embeddings import EmbeddingClient
+    client = EmbeddingClient()
+    try:
+        client.model  # loaded lazily
+        return client
+    except Exception as e:
+        return e
+
+
+def load_client(**kwargs):
+    from kgraph2.embeddings import EmbeddingClient
+    default = default_client()
+    if isinstance(default, Exception):
+        pytest.skip(f"Embedding model not available: {default}")
+    if not kwargs:
+        return default
+    client = EmbeddingClient(**kwargs)
+    try:
+        client.model  # loaded lazily
+        return client
+    except Exception as e:
+        pytest.skip(f"Embedding model not available: {e}")
+
+
+def sample_chunks():
+    """Chunk contents from the saved page sample, in arrival order (headings mixed with paragraphs)."""
+    return list(dict.fromkeys(chunk.content for page in load_sample_pages() for chunk in PageParser(page)))
+
+
+def test_embedding_length_buckets_sentences_per_second():
+    """Benchmark sentences/sec of a plain encode() call vs length-bucketed token-budget batches."""
+    client = load_client()
+    texts = sample_chunks()
+    client.model.encode(texts[:8], show_progress_bar=False)  # warm up
+
+    start = time.perf_counter()
+    baseline = client.model.encode(texts, show_progress_bar=False)
+    baseline_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bucketed = np.asarray(client.get_embeddings(texts), dtype=np.float32)
+    bucketed_elapsed = time.perf_counter() - start
+
+    assert bucketed.shape == baseline.shape
+    assert np.allclose(bucketed, baseline, atol=1e-4)
+    print(f"Embedding encode(): sentences={len(texts)} elapsed={baseline_elapsed:.4f}s "
+          f"rate={len(texts) / baseline_elapsed:.2f} sentences/sec")
+    print(f"Embedding bucketed: sentences={len(texts)} elapsed={bucketed_elapsed:.4f}s "
+          f"rate={len(texts) / bucketed_elapsed:.2f} sentences/sec")
+
+
+def test_embedding_worker_pool_scaling():
+    """Benchmark sentences/sec of the in-process encoder vs. pinned worker pools, up to the core count."""
+    import os
+    from kgraph2.embeddings import EmbeddingClient
+
+    load_client()
+    # Distinct copies, so deduplication does not shrink the workload
+    texts = [f"{text} ({copy})" for copy in range(4) for text in sample_chunks()]
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    baseline = None
+    for workers in sorted({1, 2, cores} & set(range(1, cores + 1))):
+        client = EmbeddingClient(workers=workers, max_batch_size=32)
+        try:
+            client.get_embeddings(texts[:workers * 8])  # warm up every worker
+            start = time.perf_counter()
+            vectors = np.asarray(client.get_embeddings(texts), dtype=np.float32)
+            elapsed = time.perf_counter() - start
+        finally:
+            client.close()
+
+        if baseline is None:
+            baseline = vectors
+        assert np.allclose(vectors, baseline, atol=1e-4)
+        print(f"Embedding workers={workers}: sentences={len(texts)} elapsed={elapsed:.4f}s "
+              f"rate={len(texts) / elapsed:.2f} sentences/sec")
+
+
+def test_embedding_batch_memory_lists_vs_ndarray():
+    """Benchmark peak traced memory of one 1024 x 384 batch stored on Nodes as float lists vs. ndarray row views."""
+    import tracemalloc
+    from kgraph2.models import Node, NodeType
+
+    def peak_bytes(make_vectors):
+        tracemalloc.start()
+        vectors = make_vectors()
+        nodes = [Node(uid=str(i), type=NodeType.PARAGRAPH, properties={"embedding": vec})
+                 for i, vec in enumerate(vectors)]
+        # The rows KGraphClient builds from node properties
+        rows = [{**n.properties, "uid": n.uid} for n in nodes]
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(rows) == 1024
+        return peak
+
+    encoded = np.random.default_rng(0).random((1024, 384), dtype=np.float32)
+    as_lists = peak_bytes(lambda: encoded.copy().tolist())
+    as_array = peak_bytes(lambda: encoded.copy())
+
+    assert as_array * 3 < as_lists
+    print(f"Embedding batch memory: lists={as_lists / 1024 / 1024:.2f} MB "
+          f"ndarray={as_array / 1024 / 1024:.2f} MB ratio={as_lists / as_array:.1f}x")
+
+
+def test_embedding_backends():
+    """Benchmark startup time and sentences/sec of each backend, and cosine agreement of its vectors with torch."""
+    from kgraph2.embeddings import EMBEDDING_BACKENDS
+
+    texts = sample_chunks()
+    reference = None
+    for backend in EMBEDDING_BACKENDS:
+        start = time.perf_counter()
+        try:
+            client = load_client(backend=backend)
+        except pytest.skip.Exception as e:
+            if backend == "torch":
+                raise
+            print(f"Embedding backend={backend}: unavailable ({e})")
+            continue
+        startup = time.perf_counter() - start
+
+        client.get_embeddings(texts[:8])  # warm up
+        start = time.perf_counter()
+        vectors = client.get_embeddings(texts)
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            reference = vectors
+        cosine = np.sum(vectors * reference, axis=1) / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1))
+        assert cosine.min() > 0.99
+        print(f"Embedding backend={backend}: startup={startup:.2f}s sentences={len(texts)} "
+              f"rate={len(texts) / elapsed:.2f} sentences/sec min cosine vs torch={cosine.min():.5f}")
@@ -0,0 +1,40 @@
+import os
+import tempfile
+
+import numpy as np
+
+from kgraph2.embedding_cache import EmbeddingCache
+
+def test_embedding_cache_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embeddings.sqlite")
+        cache = EmbeddingCache(path, "model-a", lru_size=1)
+
+        assert cache.get_many(["a", "b"]) == [None, None]
+        cache.put_many(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+
+        # "b" is still in the LRU, "a" was evicted and comes back from SQLite
+        a, b, c = cache.get_many(["a", "b", "c"])
+        assert a.dtype == np.float32
+        assert a.tolist() == [1.0, 2.0]
+        assert b.tolist() == [3.0, 4.0]
+        assert c is None
+        assert (cache.hits, cache.misses) == (2, 3)
+        cache.close()
+
+        # Persistent across instances, and keyed by model name
+        cache = EmbeddingCache(path, "model-a")
+        assert cache.get_many(["b"])[0].tolist() == [3.0, 4.0]
+        cache.close()
+        cache = EmbeddingCache(path, "model-b")
+        assert cache.get_many(["b"]) == [None]
+        cache.close()
+
+def test_embedding_cache_duplicate_texts():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(os.path.join(tmp, "embeddings.sqlite"), "model-a", lru_size=0)
+        cache.put_many(["== References =="], [[0.5]])
+
+        vectors = cache.get_many(["== References ==", "== References =="])
+        assert [v.tolist() for v in vectors] == [[0.5], [0.5]]
+        cache.close()
@@ -0,0 +1,91 @@
+import numpy as np
+
+from kgraph2.embeddings import backend_thread_kwargs, core_slice, dedupe, length_buckets
+
+def test_dedupe_scatters_back_in_order():
+    texts = ["== References ==", "Body", "== References ==", "{{Use dmy dates}}", "Body"]
+    unique, inverse = dedupe(texts)
+
+    assert unique == ["== References ==", "Body", "{{Use dmy dates}}"]
+    vectors = np.array([[0.0], [1.0], [2.0]], dtype=np.float32)
+    assert vectors[inverse].tolist() == [[0.0], [1.0], [0.0], [2.0], [1.0]]
+
+def test_dedupe_empty():
+    unique, inverse = dedupe([])
+    assert unique == []
+    assert len(inverse) == 0
+
+def test_length_buckets_respect_token_budget():
+    lengths = [250, 3, 3, 120, 3, 250, 3, 125]
+    buckets = length_buckets(lengths, max_batch_tokens=500, max_batch_size=3)
+
+    # Every index exactly once, longest first
+    assert sorted(np.concatenate(buckets).tolist()) == list(range(len(lengths)))
+    assert [lengths[b[0]] for b in buckets] == sorted((lengths[b[0]] for b in buckets), reverse=True)
+    for bucket in buckets:
+        assert len(bucket) <= 3
+        assert max(lengths[i] for i in bucket) * len(bucket) <= 500
+    assert [sorted(lengths[i] for i in b) for b in buckets] == [[250, 250], [3, 120, 125], [3, 3, 3]]
+
+def test_core_slice_partitions_cores():
+    cores = [0, 1, 2, 3, 4, 5, 6, 7]
+    slices = [core_slice(cores, i, 3) for i in range(3)]
+    assert slices == [[0, 1], [2, 3, 4], [5, 6, 7]]
+
+    # More workers than cores: each worker gets one core, shared round-robin
+    assert [core_slice([0, 1], i, 4) for i in range(4)] == [[0], [1], [0], [1]]
+
+def test_backend_thread_kwargs():
+    assert backend_thread_kwargs("torch", 4) == {}
+    assert backend_thread_kwargs("openvino", 4) == {"ov_config": {"INFERENCE_NUM_THREADS": 4}}
+
+def test_unknown_backend_is_rejected_before_loading():
+    import pytest
+    from kgraph2.embeddings import EmbeddingClient
+
+    with pytest.raises(ValueError, match="tensorflow"):
+        EmbeddingClient(backend="tensorflow")
+
+def test_pool_path_never_loads_the_model_in_the_parent(monkeypatch):
+    from kgraph2 import embeddings
+
+    class FakePool:
+        max_seq_length = 8
+        batches = []
+
+        def map(self, batches):
+            self.batches.extend(batches)
+            return [np.array([[len(t), 0] for t in batch], dtype=np.float32) for batch in batches]
+
+    def load_model(*args):
+        raise AssertionError("model loaded in the parent")
+
+    monkeypatch.setattr(embeddings, "load_model", load_model)
+    client = embeddings.EmbeddingClient(max_batch_tokens=16)
+    client._pool = FakePool()
+    vectors = client._encode(["a" * 100, "bb", "cc"])
+
+    assert vectors[:, 0].tolist() == [100, 2, 2]
+    # The long text counts as the workers' max_seq_length (8 tokens), so it shares a batch
+    assert [len(batch) for batch in FakePool.batches] == [2, 1]
+    assert FakePool.batches[0][0] == "a" * 100
+
+def test_get_embedding_goes_through_the_batch_path(monkeypatch):
+    from kgraph2 import embeddings
+
+    def load_model(*args):
+        raise AssertionError("model loaded in the parent")
+
+    class FakePool:
+        max_seq_length = 8
+
+        def map(self, batches):
+            return [np.array([[len(t), 1] for t in batch], dtype=np.float32) for batch in batches]
+
+    monkeypatch.setattr(embeddings, "load_model", load_model)
+    client = embeddings.EmbeddingClient()
+    client._pool = FakePool()
+
+    vector = client.get_embedding("abc")
+    assert vector.dtype == np.float32
+    assert vector.tolist() == [3, 1]
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), '..'))
+# Cumulative import time budget for the parser module, in microseconds
+PAGE_PARSER_IMPORT_BUDGET_US = 1_000_000
+HEAVY_MODULES = ("torch", "sentence_transformers", "langchain_text_splitters", "opentelemetry.sdk")
+
+
+def import_profile(module: str):
+    """Imports module in a fresh interpreter under -X importtime. Returns (cumulative us per module, loaded heavy modules)."""
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative, [m for m in result.stdout.strip().split(",") if m]
+
+
+def test_page_parser_import_time():
+    cumulative, heavy = import_profile("kgraph2.page_parser")
+    print(f"import kgraph2.page_parser: {cumulative['kgraph2.page_parser'] / 1000:.1f} ms")
+    assert heavy == []
+    assert cumulative["kgraph2.page_parser"] < PAGE_PARSER_IMPORT_BUDGET_US
+
+
+@pytest.mark.parametrize("module", ["kgraph2.embeddings", "kgraph2.pipeline", "main"])
+def test_no_heavy_imports_until_first_use(module):
+    _, heavy = import_profile(module)
+    assert heavy == []
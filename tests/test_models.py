@@ -1,7 +1,8 @@
 import pytest
+import bz2
 import os
 import tempfile
-from kgraph2.models import XMLMultiPageDoc, Chunk, NodeType
+from kgraph2.models import XMLMultiPageDoc, MultistreamDumpReader, Redirect, Checkpoint, Chunk, NodeType
 
 XML_CONTENT = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.mediawiki.org/xml/export-0.11/ http://www.mediawiki.org/xml/export-0.11.xsd" version="0.11" xml:lang="en">
   <siteinfo>
@@ -117,3 +118,105 @@ def test_xml_multi_page_doc():
     finally:
         if os.path.exists(temp_path):
             os.remove(temp_path)
+
+
+def test_xml_multi_page_doc_lxml_matches_mwxml():
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.xml', delete=False) as f:
+        f.write(XML_CONTENT)
+        temp_path = f.name
+
+    try:
+        expected = list(XMLMultiPageDoc(temp_path))
+        pages = list(XMLMultiPageDoc(temp_path, engine="lxml"))
+
+        assert pages == expected
+        assert pages[0].metadata['redirect'] == "House Tornado"
+        assert pages[1].metadata['redirect'] is None
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+@pytest.mark.parametrize("engine", ["mwxml", "lxml"])
+def test_xml_multi_page_doc_filters(engine):
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.xml', delete=False) as f:
+        f.write(XML_CONTENT)
+        temp_path = f.name
+
+    try:
+        doc = XMLMultiPageDoc(temp_path, engine=engine, namespaces={0}, skip_redirects=True)
+        pages = list(doc)
+        assert [p.title for p in pages] == ["State of Change"]
+        assert doc.redirects == [Redirect(title="House Tornado (album)", target="House Tornado")]
+
+        doc = XMLMultiPageDoc(temp_path, engine=engine, skip_title_prefixes=("State ",))
+        assert [p.title for p in doc] == ["House Tornado (album)"]
+        assert doc.redirects == []
+
+        # Talk: namespace only
+        assert list(XMLMultiPageDoc(temp_path, engine=engine, namespaces={1})) == []
+
+        doc = XMLMultiPageDoc(temp_path, engine=engine, skip_redirects=True,
+                              resume_from=Checkpoint(page_id=5399372))
+        assert [p.title for p in doc] == ["State of Change"]
+        # Already committed before the checkpoint, so not re-emitted either
+        assert doc.redirects == []
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _write_multistream(directory: str):
+    """Splits XML_CONTENT into the header / one-stream-per-page / footer layout of a multistream dump."""
+    header, rest = XML_CONTENT.split("  <page>", 1)
+    pages = ["  <page>" + p for p in rest.split("  <page>")]
+    pages[-1], footer = pages[-1].split("</mediawiki>")
+    footer = "</mediawiki>" + footer
+
+    dump_path = os.path.join(directory, "dump-multistream.xml.bz2")
+    index_path = os.path.join(directory, "dump-multistream-index.txt.bz2")
+    index_lines = []
+    with open(dump_path, "wb") as f:
+        f.write(bz2.compress(header.encode("utf-8")))
+        for page_id, title, page in zip(["5399372", "5399373"], ["House Tornado (album)", "State of Change"], pages):
+            index_lines.append(f"{f.tell()}:{page_id}:{title}\n")
+            f.write(bz2.compress(page.encode("utf-8")))
+        f.write(bz2.compress(footer.encode("utf-8")))
+
+    with bz2.open(index_path, "wt", encoding="utf-8") as f:
+        f.writelines(index_lines)
+
+    return dump_path, index_path
+
+@pytest.mark.parametrize("engine", ["mwxml", "lxml"])
+def test_multistream_dump_reader(engine):
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_path, index_path = _write_multistream(tmp)
+        pages = list(MultistreamDumpReader(dump_path, index_path, workers=2, engine=engine))
+
+    assert [p.title for p in pages] == ["House Tornado (album)", "State of Change"]
+    assert str(pages[0].metadata['page_id']) == "5399372"
+    assert "#REDIRECT [[House Tornado]]" in pages[0].raw_content
+    assert "[[Christopher Bulis]]" in pages[1].raw_content
+    assert pages[0].metadata['stream_offset'] < pages[1].metadata['stream_offset']
+
+def test_multistream_dump_reader_filters():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_path, index_path = _write_multistream(tmp)
+        reader = MultistreamDumpReader(dump_path, index_path, workers=2, engine="lxml",
+                                       namespaces={0}, skip_redirects=True)
+        pages = list(reader)
+
+    assert [p.title for p in pages] == ["State of Change"]
+    assert reader.redirects == [Redirect(title="House Tornado (album)", target="House Tornado")]
+
+def test_multistream_dump_reader_resume():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_path, index_path = _write_multistream(tmp)
+        first, second = list(MultistreamDumpReader(dump_path, index_path, workers=1))
+
+        checkpoint = Checkpoint.from_page(first)
+        reader = MultistreamDumpReader(dump_path, index_path, workers=1, resume_from=checkpoint)
+        assert reader._stream_bounds()[1][0][0] == checkpoint.stream_offset
+        assert [p.title for p in reader] == [second.title]
+
+        checkpoint = Checkpoint.from_page(second)
+        assert list(MultistreamDumpReader(dump_path, index_path, workers=1, resume_from=checkpoint)) == []
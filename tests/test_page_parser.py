@@ -1,8 +1,12 @@
 import pytest
-from kgraph2.models import Page, NodeType
-from kgraph2.page_parser import PageParser
-
-def test_page_parser_iterator():
+from concurrent.futures.process import BrokenProcessPool
+from kgraph2.models import Page, Chunk, NodeType
+from kgraph2.config import ChunkingConfig
+from kgraph2.page_parser import (PageParser, PageParserInner, ParallelPageParser, PARSER_ENGINES, get_text_splitter,
+                                 parse_pages, strip_markup, strip_wikicode)
+
+@pytest.mark.parametrize("engine", PARSER_ENGINES)
+def test_page_parser_iterator(engine):
     content = """Line 1
 Line 2
 
@@ -13,7 +17,7 @@ Line 4
 Line 5
 """
     page = Page(title="Test Page", raw_content=content)
-    parser = PageParser(page)
+    parser = PageParser(page, engine=engine)
     chunks = list(parser)
 
     assert len(chunks) == 5
@@ -48,7 +52,8 @@ Line 5
     assert chunks[4].index == 4
     assert chunks[4].hierarchy_owner == "Subheading"
 
-def test_page_parser_hierarchy():
+@pytest.mark.parametrize("engine", PARSER_ENGINES)
+def test_page_parser_hierarchy(engine):
     content = """
 Intro paragraph.
 == Heading 1 ==
@@ -59,7 +64,7 @@ S1.1 paragraph.
 H2 paragraph.
 """
     page = Page(title="Main Page", raw_content=content)
-    parser = PageParser(page)
+    parser = PageParser(page, engine=engine)
     chunks = list(parser)
 
     # Chunks:
@@ -92,10 +97,11 @@ H2 paragraph.
     assert chunks[6].content == "H2 paragraph."
     assert chunks[6].hierarchy_owner == "Heading 2"
 
-def test_page_parser_starts_with_heading():
+@pytest.mark.parametrize("engine", PARSER_ENGINES)
+def test_page_parser_starts_with_heading(engine):
     content = "== Title ==\nSome content"
     page = Page(title="Test", raw_content=content)
-    parser = PageParser(page)
+    parser = PageParser(page, engine=engine)
     chunks = list(parser)
 
     assert len(chunks) == 2
@@ -106,13 +112,143 @@ def test_page_parser_starts_with_heading():
     assert chunks[1].type == NodeType.PARAGRAPH
     assert chunks[1].hierarchy_owner == "Title"
 
-def test_page_parser_no_headings():
+@pytest.mark.parametrize("engine", PARSER_ENGINES)
+def test_page_parser_no_headings(engine):
     content = "Just some\ntext lines."
     page = Page(title="Test", raw_content=content)
-    parser = PageParser(page)
+    parser = PageParser(page, engine=engine)
     chunks = list(parser)
 
     assert len(chunks) == 1
     assert chunks[0].content == content
     assert chunks[0].type == NodeType.PARAGRAPH
     assert chunks[0].hierarchy_owner == "Test"
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_pages_preserves_order(workers):
+    pages = [
+        Page(title=f"Page {i}", raw_content=f"Intro {i} [[Link{i}]].\n== Heading {i} ==\nBody {i}.")
+        for i in range(10)
+    ]
+    results = list(parse_pages(pages, workers=workers, max_inflight=3))
+
+    assert [page.title for page, _ in results] == [page.title for page in pages]
+    for page, chunks in results:
+        assert chunks == list(PageParser(page))
+
+def test_parse_errors_skip_the_page_but_a_broken_pool_raises():
+    page = Page(title="Test", raw_content="Body.")
+
+    def fail(error):
+        raise error
+
+    assert ParallelPageParser._collect(page, fail, ValueError("bad markup")) == []
+    with pytest.raises(BrokenProcessPool):
+        ParallelPageParser._collect(page, fail, BrokenProcessPool("worker died"))
+
+def test_page_parser_chunking_config():
+    assert get_text_splitter() is get_text_splitter()
+
+    config = ChunkingConfig(chunk_size=20, chunk_overlap=0, separators=(" ",))
+    page = Page(title="Test", raw_content="one two three four five six seven eight nine ten")
+    chunks = list(PageParser(page, get_text_splitter(config)))
+
+    assert len(chunks) > 1
+    assert all(len(c.content) <= 20 for c in chunks)
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+
+@pytest.mark.parametrize("content", [
+    "==Plot==\nNo spaces around the title.",
+    "=== Uneven ==\nExtra '=' go to the title.\n== Other ===\nOn both sides.",
+    "== Trailing ==  \t\nWhitespace after the heading.",
+    "== Notes == <!-- hidden -->\nComment after the heading.",
+    "== Refs ==<ref name=\"a\" />\nMarkup with '=' after the heading.",
+    "Text\n<!--\n== Commented out ==\n-->\n<ref>\n== In a ref ==\n</ref>\nMore text",
+    "Not a heading == x ==\n====\n=== ===\nEnd",
+    "Text\n{{Quote|text=\n== In a template ==\n}}\n== After ==\nEnd",
+    "Text\n{{Outer|{{inner}}\n== Nested ==\n}}\nEnd",
+    "Text\n{|\n|-\n| cell\n== In a table ==\n|}\nEnd",
+    "Text\n[[File:x|cap\n== In a link ==\n]]\nEnd",
+    "Text\n<div>\n== In a div ==\n</div>\n<poem>\n== In a poem ==\n</poem>\nEnd",
+    "Text\n<blockquote>\n== In a blockquote ==\n</blockquote>\n<includeonly>\n== Included ==\n</includeonly>\nEnd",
+    "Text\n<div>\n{{x|\n</div>\n== Closer inside a template ==\n}}\nEnd",
+    "Text\n{{Unclosed\n== After a stray opener ==\n<div>\n== After an unclosed div ==\n<!--\n== After an unclosed comment ==",
+    "Text [[Broken\n== Line break in a link title ==\n]] and [[Fine|label\n== In a link label ==\n]]\nEnd",
+    "Text\n{{Broken\nname|x\n== Text after a line break in a template name ==\n}}\n{{Fine\n|x\n== In a template ==\n}}\nEnd",
+    "Text\n{{Broken [[x]]|y\n== Link in a template name ==\n}}\n{{Fine<!-- c -->{{n}}\n|y\n== In a template ==\n}}\nEnd",
+    "Text\n<poem>\n</span>\n== Stray closing tag in a tag ==\n</poem>\n<div><span>\n== In a div ==\n</div>\nEnd",
+])
+def test_regex_engine_matches_mwparserfromhell(content):
+    page = Page(title="Test", raw_content=content)
+    assert list(PageParserInner(page, engine="regex")) == list(PageParserInner(page))
+
+@pytest.mark.parametrize("engine", PARSER_ENGINES)
+def test_page_parser_records_links(engine):
+    content = """Intro with [[Link1]] and [[Link2|label]] and [[Link1]] again.
+== Heading [[HeadingLink]] ==
+Body [[Link3]]."""
+    chunks = list(PageParser(Page(title="Test", raw_content=content), engine=engine))
+
+    assert chunks[0].get_links() == ["Link1", "Link2"]
+    assert chunks[0].link_spans == [(11, "Link1"), (25, "Link2"), (45, "Link1")]
+    assert chunks[1].get_links() == ["HeadingLink"]
+    assert chunks[2].get_links() == ["Link3"]
+
+def test_page_parser_links_follow_sub_chunks():
+    words = [f"word{i} [[Target{i}]]" for i in range(30)]
+    content = " ".join(words)
+    config = ChunkingConfig(chunk_size=120, chunk_overlap=30, separators=(" ",))
+    chunks = list(PageParser(Page(title="Test", raw_content=content), get_text_splitter(config)))
+
+    assert len(chunks) > 1
+    # Every link lands on a sub-chunk, and recorded offsets point at it inside that sub-chunk
+    assert set().union(*(c.get_links() for c in chunks)) == {f"Target{i}" for i in range(30)}
+    for chunk in chunks:
+        for offset, target in chunk.link_spans:
+            assert chunk.content[offset:].startswith(f"[[{target}]]")
+        # Same links as a rescan of the sub-chunk text
+        assert chunk.get_links() == Chunk(chunk.content, 0, NodeType.PARAGRAPH, "Test").get_links()
+
+@pytest.mark.parametrize("content, expected", [
+    ("== History ==", "History"),
+    ("'''Monica''' is a [[softball|softball player]] from [[Ohio]].<ref name=a>{{cite web|url=x}}</ref> She won.<ref name=a/>",
+     "Monica is a softball player from Ohio. She won."),
+    ("{{Short description|Foo}}\n{{Use mdy dates|date=January 2019}}", ""),
+    ("[[Category:Foo]]\n[[Category:Bar]]", ""),
+    ("{{Infobox|a={{b|c}}|d=e}}\nText after", "Text after"),
+    ("A &amp; B <small>tiny</small> [http://x.com site] [http://y.com]", "A & B tiny site"),
+    ("x <!-- c --> y <math>x^2</math> z", "x y z"),
+    ("* item one\n* item two\n:indented", "item one\nitem two\nindented"),
+    ("Ref<ref>Smith, ''Book''.</ref> end", "Ref end"),
+])
+def test_strip_markup_matches_strip_wikicode(content, expected):
+    assert strip_wikicode(content) == expected
+    assert strip_markup(content) == expected
+
+@pytest.mark.parametrize("engine", PARSER_ENGINES)
+def test_page_parser_plain_text(engine):
+    content = "{{Use dmy dates}}\n'''Ada''' was born in [[London|the capital]].<ref>{{cite book}}</ref>\n== Later [[life]] ==\nText."
+    chunks = list(PageParser(Page(title="Ada", raw_content=content), engine=engine))
+
+    assert [c.plain_text for c in chunks] == ["Ada was born in the capital.", "Later life", "Text."]
+    assert chunks[0].content.startswith("{{Use dmy dates}}")
+
+def test_plain_text_drops_markup_cut_by_the_splitter():
+    content = ("{{Infobox person\n| name = Ada Lovelace\n| image = Ada.jpg\n| birth_place = [[London]]\n}}\n"
+               "'''Ada''' was a mathematician.<ref>{{cite book |title=Ada, Countess of Lovelace |year=1999}}</ref> "
+               "She wrote the first program.<!-- keep this comment out of the embedding --> She died in 1852.")
+    splitter = get_text_splitter(ChunkingConfig(chunk_size=40, chunk_overlap=0, separators=(" ",)))
+    chunks = list(PageParser(Page(title="Ada", raw_content=content), splitter))
+
+    assert len(chunks) > 5
+    for chunk in chunks:
+        for markup in ("{{", "}}", "<ref", "</ref", "cite", "name =", "<!--", "embedding"):
+            assert markup not in chunk.plain_text
+    assert " ".join(c.plain_text for c in chunks if c.plain_text) == (
+        "Ada was a mathematician. She wrote the first program. She died in 1852.")
+
+def test_plain_text_does_not_depend_on_the_engine():
+    content = "{{Use dmy dates}}\n'''Ada''' [[London|lived]] here.<ref>x</ref>\n== Later ==\n{{Quote|text=Hi}} Text."
+    page = Page(title="Ada", raw_content=content)
+    assert ([c.plain_text for c in PageParser(page, engine="regex")]
+            == [c.plain_text for c in PageParser(page, engine="mwparserfromhell")])
@@ -0,0 +1,126 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from kgraph2.checkpoint import CheckpointStore
+from kgraph2.config import ChunkFilterConfig
+from kgraph2.models import Page, NodeType
+from kgraph2.pipeline import Pipeline, build_page_graph, normalize_link_target
+from kgraph2.page_parser import PageParser
+
+class FakeEmbedClient:
+    last_dedup_ratio = 0.0
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def get_embeddings(self, texts):
+        if self.fail:
+            raise RuntimeError("model crashed")
+        self.calls.append(len(texts))
+        return np.array([[float(len(t))] for t in texts], dtype=np.float32)
+
+class FakeKGClient:
+    def __init__(self):
+        self.nodes = []
+        self.links = []
+
+    def write_nodes(self, nodes):
+        self.nodes.extend(nodes)
+
+    def write_links(self, links):
+        self.links.extend(links)
+
+    def write_many(self, nodes=(), links=()):
+        self.write_nodes(nodes)
+        self.write_links(links)
+
+    def commit_barrier(self, callback):
+        callback()
+
+def make_pages(n):
+    return [
+        Page(title=f"Page {i}", raw_content=f"Intro of [[Page {i + 1}]].\n== History ==\nPage {i} history.",
+             metadata={"page_id": i + 1})
+        for i in range(n)
+    ]
+
+def test_build_page_graph():
+    page = make_pages(1)[0]
+    graph = build_page_graph(page, list(PageParser(page)))
+
+    assert graph.nodes[0].uid == "Page 0"
+    assert graph.nodes[0].type == NodeType.TITLE
+    assert "Page 0#History" in [n.uid for n in graph.nodes]
+    assert len(graph.embed_nodes) == len(graph.embed_texts) == len(graph.nodes) - 1
+    assert ("Page 0", "Page 0#History") in [(l.source_uid, l.target_uid) for l in graph.links]
+    # Only mentions may point at pages that are not ingested
+    assert {l.target_uid for l in graph.links if l.stub_target} == {"Page 1"}
+
+@pytest.mark.parametrize("target, expected", [
+    ("softball", "Softball"),
+    ("Softball#Scoring runs", "Softball"),
+    ("New_York  City", "New York City"),
+    ("Star Wars: Episode IV", "Star Wars: Episode IV"),
+    ("Category:Living people", None),
+    (":Category:Living people", None),
+    ("File:Abbott.jpg", None),
+    ("wikt:pitcher", None),
+    ("fr:Monica Abbott", None),
+    ("#Career", None),
+])
+def test_normalize_link_target(target, expected):
+    assert normalize_link_target(target) == expected
+
+def test_mention_links_point_at_normalized_titles():
+    page = Page(title="Page", raw_content="[[softball]], [[Softball#Rules|rules]] and [[Category:Sports]].",
+                metadata={"page_id": 1})
+    graph = build_page_graph(page, list(PageParser(page)))
+
+    assert [l.target_uid for l in graph.links if l.stub_target] == ["Softball"]
+
+def test_pipeline_writes_every_page_and_checkpoints(tmp_path):
+    kg_client = FakeKGClient()
+    embed_client = FakeEmbedClient()
+    store = CheckpointStore(str(tmp_path / "checkpoint.json"), "dump.xml")
+    pipeline = Pipeline(kg_client, embed_client, checkpoint_store=store, embed_batch_size=8,
+                        queue_size=4, parser_workers=1, report_interval=0.01,
+                        chunk_filter=ChunkFilterConfig(min_prose_chars=0))
+
+    pipeline.run(make_pages(50))
+
+    titles = [n.uid for n in kg_client.nodes if n.type == NodeType.TITLE]
+    assert titles == [f"Page {i}" for i in range(50)]
+    assert all("embedding" in n.properties for n in kg_client.nodes if n.type != NodeType.TITLE)
+    assert sum(embed_client.calls) == len(kg_client.nodes) - 50
+    assert store.load().page_id == 50
+    assert pipeline.queue_depths() == {"pages": 0, "graphs": 0, "batches": 0}
+
+def test_pipeline_with_a_parser_pool(tmp_path):
+    kg_client = FakeKGClient()
+    store = CheckpointStore(str(tmp_path / "checkpoint.json"), "dump.xml")
+    pipeline = Pipeline(kg_client, FakeEmbedClient(), checkpoint_store=store, embed_batch_size=8,
+                        queue_size=4, parser_workers=2, chunk_filter=ChunkFilterConfig(min_prose_chars=0))
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        pipeline.run(make_pages(20))
+
+    # Python 3.12+ warns when fork() is called from a process that already runs threads
+    assert not [w for w in caught if "fork()" in str(w.message)]
+
+    titles = [n.uid for n in kg_client.nodes if n.type == NodeType.TITLE]
+    assert titles == [f"Page {i}" for i in range(20)]
+    assert store.load().page_id == 20
+
+def test_pipeline_reraises_stage_failure(tmp_path):
+    kg_client = FakeKGClient()
+    store = CheckpointStore(str(tmp_path / "checkpoint.json"), "dump.xml")
+    pipeline = Pipeline(kg_client, FakeEmbedClient(fail=True), checkpoint_store=store,
+                        embed_batch_size=8, queue_size=4, parser_workers=1)
+
+    with pytest.raises(RuntimeError, match="model crashed"):
+        pipeline.run(make_pages(50))
+    assert store.load() is None
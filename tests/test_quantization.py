@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from kgraph2.quantization import EMBEDDING_DTYPES, decode_embedding, dequantize, embedding_properties, quantize
+
+@pytest.mark.parametrize("dtype", EMBEDDING_DTYPES)
+def test_embedding_properties_round_trip(dtype):
+    vectors = np.random.default_rng(0).standard_normal((8, 384)).astype(np.float32)
+    vectors[3] = 0
+
+    props = embedding_properties(vectors, dtype)
+    decoded = np.stack([decode_embedding(p, dtype) for p in props])
+
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded[3], np.zeros(384, dtype=np.float32))
+    tolerance = {"float32": 0, "float16": 1e-2, "int8": np.abs(vectors).max(axis=1, keepdims=True) / 127 / 2 + 1e-6}[dtype]
+    assert np.all(np.abs(decoded - vectors) <= tolerance)
+
+def test_int8_codes_and_scales():
+    vectors = np.array([[0.5, -1.0, 0.25]], dtype=np.float32)
+    codes, scales = quantize(vectors, "int8")
+
+    assert codes.tolist() == [[64, -127, 32]]
+    assert np.allclose(dequantize(codes, "int8", scales), vectors, atol=scales[0])
+
+def test_unknown_dtype():
+    with pytest.raises(ValueError):
+        quantize(np.zeros((1, 3)), "int4")
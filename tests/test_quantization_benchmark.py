@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from kgraph2.quantization import EMBEDDING_DTYPES, decode_embedding, embedding_properties
+
+
+def packed_size(value) -> int:
+    """Bytes the neo4j driver's PackStream encoder writes for a value."""
+    try:
+        from neo4j._codec.packstream.v1 import Packer
+    except ImportError as e:
+        pytest.skip(f"neo4j PackStream encoder not available: {e}")
+
+    class Buffer(bytearray):
+        def write(self, data):
+            self.extend(data)
+
+    buffer = Buffer()
+    Packer(buffer).pack(value)
+    return len(buffer)
+
+
+def clustered_embeddings(rng, centroids, n):
+    """Unit vectors around the given centroids, roughly like sentence embeddings of related paragraphs."""
+    vectors = centroids[rng.integers(0, len(centroids), n)] + 0.6 * rng.standard_normal((n, centroids.shape[1])).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_embedding_dtype_bytes_and_recall():
+    """Benchmark Bolt bytes per node and recall@10 on held-out queries for each embedding storage dtype."""
+    rng = np.random.default_rng(0)
+    centroids = rng.standard_normal((200, 384)).astype(np.float32)
+    corpus = clustered_embeddings(rng, centroids, 20_000)
+    # Held out: drawn from the same topics, but not part of the corpus
+    queries = clustered_embeddings(rng, centroids, 200)
+    k = 10
+    exact = np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+
+    for dtype in EMBEDDING_DTYPES:
+        props = embedding_properties(corpus, dtype)
+        bytes_per_node = packed_size(props[0])
+        decoded = np.stack([decode_embedding(p, dtype) for p in props])
+        found = np.argsort(-(queries @ decoded.T), axis=1)[:, :k]
+        recall = np.mean([len(set(f) & set(e)) / k for f, e in zip(found, exact)])
+
+        assert recall > 0.9
+        print(f"Embedding dtype={dtype}: bytes/node={bytes_per_node} recall@{k}={recall:.4f}")
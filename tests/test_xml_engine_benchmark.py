@@ -0,0 +1,65 @@
+import os
+import tempfile
+import time
+
+from kgraph2.models import XMLMultiPageDoc
+
+HEADER = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" version="0.11" xml:lang="en">
+  <siteinfo>
+    <sitename>Wikipedia</sitename>
+    <dbname>enwiki</dbname>
+    <case>first-letter</case>
+    <namespaces>
+      <namespace key="0" case="first-letter" />
+    </namespaces>
+  </siteinfo>
+"""
+
+PAGE = """  <page>
+    <title>Benchmark page {i}</title>
+    <ns>0</ns>
+    <id>{i}</id>
+    <revision>
+      <id>{rev}</id>
+      <timestamp>2023-10-02T19:06:25Z</timestamp>
+      <contributor>
+        <username>Bench</username>
+        <id>1</id>
+      </contributor>
+      <model>wikitext</model>
+      <format>text/x-wiki</format>
+      <text bytes="0" xml:space="preserve">{text}</text>
+      <sha1>gwrw4aaf5eltrs8zqj1yhm4f4ja3g6c</sha1>
+    </revision>
+  </page>
+"""
+
+TEXT = ("'''Benchmark''' is a [[page]] with some [[Wiki|wikitext]] in it.\n\n"
+        "==Section==\nMore text about [[Something]] and other things.\n") * 10
+
+
+def test_xml_engine_pages_per_second():
+    """Benchmark pages/sec of the mwxml and lxml engines on the same synthetic dump."""
+    n_pages = 5000
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.xml', delete=False) as f:
+        f.write(HEADER)
+        for i in range(1, n_pages + 1):
+            f.write(PAGE.format(i=i, rev=1000 + i, text=TEXT))
+        f.write("</mediawiki>\n")
+        temp_path = f.name
+
+    try:
+        rates = {}
+        for engine in ["mwxml", "lxml"]:
+            start = time.perf_counter()
+            count = sum(1 for _ in XMLMultiPageDoc(temp_path, engine=engine))
+            elapsed = time.perf_counter() - start
+
+            assert count == n_pages
+            rates[engine] = count / elapsed if elapsed > 0 else 0
+            print(f"XML engine {engine}: pages={count} elapsed={elapsed:.4f}s rate={rates[engine]:.2f} pages/sec")
+
+        print(f"lxml speedup: {rates['lxml'] / rates['mwxml']:.2f}x")
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)